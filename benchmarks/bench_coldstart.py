@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from benchmarks.fixtures import FakeOpenAPI
+from benchmarks.bench_suite import git_revision
+
+HEAVY_MODULES = ('pyarrow', 'pyacet', 'matplotlib', 'seaborn', 'scipy')
+
+# Run in a fresh interpreter, so every measurement includes interpreter start and all module imports.
+IMPORT_CHILD = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start, 'heavy': sorted(name for name in {heavy!r} if name in sys.modules)}}))
+"""
+
+CRAWL_CHILD = """
+import sys, json
+sys.path.insert(0, {root!r})
+from modules.data.crawler import Config, Crawler
+Crawler(Config(**json.loads(sys.argv[1]))).insert_to_db('trade')
+"""
+
+def measure_import(module):
+    output = subprocess.run([sys.executable, '-c', IMPORT_CHILD.format(root=ROOT_DIR, module=module, heavy=HEAVY_MODULES)], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def write_district_snapshot(path, db_name, region_codes):
+    # A valid snapshot written up front, so the crawler under test never needs district_code from MySQL.
+    from modules.data.district import DistrictSnapshot, SNAPSHOT_VERSION
+    from modules.util.utils import load_config
+    cols = load_config('./config/db/table_configs.json')['district_code']['list']
+    rows = [[{'region_code': region_code, 'addr_1': 'Bench-si', 'addr_2': 'Bench-gu'}.get(col) for col in cols] for region_code in region_codes]
+    snapshot = {
+        'version': SNAPSHOT_VERSION, 'database': db_name, 'table': 'district_code', 'columns': cols, 'created_at': time.time(),
+        'table_checksum': None, 'checksum': DistrictSnapshot.rows_checksum(rows), 'rows': rows
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+
+def measure_first_request(db_name, timeout):
+    # Wall time from spawning a crawler process to the stand-in API receiving its first request. The crawler is
+    # stopped right after, so no MySQL writes are involved.
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeOpenAPI(items_per_cell=10) as api:
+        api_config_path = os.path.join(tmp_dir, 'openapi_configs.json')
+        with open(api_config_path, 'w') as f:
+            json.dump({'service_url': api.url, 'service_key': ['bench']}, f)
+        snapshot_path = os.path.join(tmp_dir, 'district_code.json')
+        write_district_snapshot(snapshot_path, db_name, ['11110'])
+        config = {
+            'DB_NAME': db_name, 'IMPORT_TBL_NAME': 'district_code', 'START_YEAR': 2023, 'END_YEAR': 2023,
+            'API_CONFIG_PATH': api_config_path, 'LEDGER_PATH': os.path.join(tmp_dir, 'task_ledger.sqlite3'),
+            'EMPTY_INDEX_PATH': os.path.join(tmp_dir, 'emptiness_index.json'), 'DISTRICT_SNAPSHOT_PATH': snapshot_path,
+            'QUOTA_BACKEND': 'local', 'STORE_RAW': False, 'SKIP_EMPTY': False, 'REFRESH_SUMMARY': False, 'METRICS_PATH': None
+        }
+
+        start = time.time()
+        process = subprocess.Popen([sys.executable, '-c', CRAWL_CHILD.format(root=ROOT_DIR), json.dumps(config)], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            while api.first_request_at is None and process.poll() is None and time.time() - start < timeout:
+                time.sleep(0.005)
+        finally:
+            process.kill()
+            _, stderr = process.communicate()
+        if api.first_request_at is None:
+            raise RuntimeError(f"Crawler made no request within {timeout}s: {stderr.decode('utf-8', 'replace')[-500:]}")
+        return api.first_request_at - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cold start of the crawler: fresh-process import time and time to the first API request.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db-name', default='atamDB')
+    parser.add_argument('--target', type=float, default=1.0, help='seconds allowed from process start to first request')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--output', default='./docs/bench/coldstart.json')
+    args = parser.parse_args()
+
+    results = {}
+    for module in ('modules.data.crawler', 'modules.analysis.eda'):
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        results[f"import {module}"] = {'median_seconds': float(np.median([run['seconds'] for run in runs])), 'heavy_modules': runs[-1]['heavy']}
+    first_request = [measure_first_request(args.db_name, args.timeout) for _ in range(args.repeat)]
+    results['first_request'] = {'median_seconds': float(np.median(first_request)), 'max_seconds': max(first_request), 'target_seconds': args.target}
+
+    for name, result in results.items():
+        print(f"{name:>32}: {json.dumps(result)}")
+
+    report = {'revision': git_revision(), 'created_at': time.time(), 'python': platform.python_version(), 'params': vars(args), 'results': results}
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    sys.exit(0 if results['first_request']['median_seconds'] <= args.target else 1)
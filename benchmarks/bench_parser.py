@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from modules.data.parser import ITEM_FIELDS, parse_response
+from benchmarks.fixtures import synthetic_response
+
+def parse_soup(content):
+    soup = BeautifulSoup(content, 'lxml-xml')
+    result_code = soup.find('resultCode').text if soup.find('resultCode') else 'Unknown'
+    total_count = int(soup.find('totalCount').text) if soup.find('totalCount') else 0
+    records = []
+    for item in soup.find_all('item'):
+        record = {}
+        for tag in ITEM_FIELDS:
+            found = item.find(tag)
+            record[tag] = found.string.strip() if found and found.string else None
+        records.append(record)
+    return result_code, total_count, records
+
+def parse_stream(content):
+    parsed = parse_response(content)
+    return parsed.result_code, parsed.total_count, parsed.items
+
+def measure(func, content, repeat):
+    # Timing and memory are taken in separate runs; tracemalloc slows allocation-heavy code considerably.
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _, total_count, records = func(content)
+    elapsed = time.perf_counter() - start
+    assert total_count == len(records)
+
+    tracemalloc.start()
+    func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return len(records) * repeat / elapsed, peak / 1024 ** 2
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare BeautifulSoup and lxml iterparse response parsing.')
+    parser.add_argument('--items', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'parser':>10} {'items/sec':>12} {'peak MB':>10}")
+    for n_items in args.items:
+        content = synthetic_response(n_items)
+        for name, func in (('bs4', parse_soup), ('iterparse', parse_stream)):
+            items_per_sec, peak_mb = measure(func, content, args.repeat)
+            print(f"{n_items:>8} {name:>10} {items_per_sec:>12,.0f} {peak_mb:>10.1f}")
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from modules.data.parser import parse_response
+from modules.data.preprocessor import Preprocessor, TRADE_NATURAL_KEY
+from modules.data.pipeline import parse_content
+from benchmarks.fixtures import synthetic_response, FakeOpenAPI, DisposableDB
+
+# Throughput metrics regress when they drop, peak_rss_mb and latencies when they grow.
+HIGHER_IS_BETTER = ('queries_per_sec', 'items_per_sec', 'rows_per_sec', 'mb_per_sec')
+LOWER_IS_BETTER = ('peak_rss_mb', 'p50_ms', 'p99_ms')
+BENCH_DISTRICTS = pd.DataFrame({'region_code': ['11110'], 'addr_1': ['Bench-si'], 'addr_2': ['Bench-gu']})
+
+def synthetic_rows(n_rows, items_per_response=1000):
+    # Distinct months per response so the natural keys (and row_key upserts) do not collapse onto each other.
+    preprocessor = Preprocessor(BENCH_DISTRICTS)
+    rows = []
+    for idx in range((n_rows + items_per_response - 1) // items_per_response):
+        content = synthetic_response(min(items_per_response, n_rows - len(rows)), seed=idx, deal_year=2000 + idx // 12, deal_month=idx % 12 + 1)
+        rows.extend(preprocessor.transform(parse_response(content).items)[0])
+    return rows
+
+def scenario_parse(params):
+    content = synthetic_response(params['items'])
+    start = time.perf_counter()
+    for _ in range(params['repeat']):
+        items = parse_response(content).items
+    elapsed = time.perf_counter() - start
+    return {'items_per_sec': len(items) * params['repeat'] / elapsed, 'mb_per_sec': len(content) * params['repeat'] / elapsed / 1024 ** 2}
+
+def scenario_preprocess(params):
+    items = parse_response(synthetic_response(params['items'])).items
+    preprocessor = Preprocessor(BENCH_DISTRICTS)
+    start = time.perf_counter()
+    for _ in range(params['repeat']):
+        rows, _ = preprocessor.transform(items)
+    elapsed = time.perf_counter() - start
+    return {'items_per_sec': len(items) * params['repeat'] / elapsed, 'rows': len(rows)}
+
+def scenario_fetch(params):
+    # HTTP GET + parse + preprocess per query against the local stand-in, CONCURRENCY queries in flight.
+    import requests
+    from modules.data.crawler import Query
+
+    preprocessor = Preprocessor(BENCH_DISTRICTS)
+    local = threading.local()
+    queries = [Query('11110', f"{2000 + idx // 12}{idx % 12 + 1:02d}", num_of_rows=params['items']) for idx in range(params['queries'])]
+
+    with FakeOpenAPI(items_per_cell=params['items'], latency=params['latency'], jitter=params['jitter']) as api:
+        def run(query):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            start = time.perf_counter()
+            response = local.session.get(query.to_url(api.url, 'bench'), timeout=30)
+            batch = parse_content([response.content], preprocessor)
+            return time.perf_counter() - start, batch.item_cnt
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(params['concurrency']) as executor:
+            results = list(executor.map(run, queries))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    return {
+        'queries_per_sec': len(queries) / elapsed,
+        'items_per_sec': sum(item_cnt for _, item_cnt in results) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99))
+    }
+
+def scenario_insert(params):
+    rows = synthetic_rows(params['rows'])
+    report = {}
+    with DisposableDB(region_codes=['11110']) as db:
+        start = time.perf_counter()
+        db.dbm.insert_data('trade', rows)
+        report['insert_data_rows_per_sec'] = len(rows) / (time.perf_counter() - start)
+
+        methods = ['values', 'infile'] if db.dbm.local_infile else ['values']
+        db.dbm.migrate_row_key('trade', TRADE_NATURAL_KEY)
+        for method in methods:
+            row_cnt, elapsed = db.dbm.bulk_insert('trade', rows, method=method, key_cols=TRADE_NATURAL_KEY)
+            report[f"bulk_{method}_rows_per_sec"] = row_cnt / elapsed
+    report['rows_per_sec'] = max(value for key, value in report.items() if key.endswith('rows_per_sec'))
+    return report
+
+def scenario_import(params):
+    rows = synthetic_rows(params['rows'])
+    with DisposableDB(region_codes=['11110']) as db:
+        db.dbm.bulk_insert('trade', rows)
+        start = time.perf_counter()
+        data = db.dbm.import_data('trade', db.dbm.tbl_config['trade']['list'])
+        elapsed = time.perf_counter() - start
+    size_mb = data.memory_usage(deep=True).sum() / 1024 ** 2
+    return {'rows_per_sec': len(data) / elapsed, 'mb_per_sec': size_mb / elapsed, 'mb': size_mb}
+
+def scenario_crawl(params):
+    # End-to-end Crawler.insert_to_db: stand-in API -> fetch/parse/write pipeline -> disposable database.
+    from modules.data.crawler import Config, Crawler
+
+    with tempfile.TemporaryDirectory() as tmp_dir, DisposableDB() as db, \
+            FakeOpenAPI(items_per_cell=params['items'], latency=params['latency'], jitter=params['jitter']) as api:
+        api_config_path = os.path.join(tmp_dir, 'openapi_configs.json')
+        with open(api_config_path, 'w') as f:
+            json.dump({'service_url': api.url, 'service_key': ['bench']}, f)
+        config = Config(
+            DB_NAME=db.db_name, IMPORT_TBL_NAME='district_code', START_YEAR=2023, END_YEAR=2023,
+            API_CONFIG_PATH=api_config_path, LEDGER_PATH=os.path.join(tmp_dir, 'task_ledger.sqlite3'),
+            EMPTY_INDEX_PATH=os.path.join(tmp_dir, 'emptiness_index.json'), DISTRICT_SNAPSHOT_PATH=os.path.join(tmp_dir, 'district_code.json'),
+            QUOTA_BACKEND='local', CONCURRENCY=params['concurrency'], PARSE_WORKERS=params['parse_workers'], KEY_RATE_LIMIT=1e6,
+            STORE_RAW=False, SKIP_EMPTY=False, REFRESH_SUMMARY=False
+        )
+        start = time.perf_counter()
+        Crawler(config).insert_to_db('trade')
+        elapsed = time.perf_counter() - start
+        with db.dbm.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM trade")
+            row_cnt = cursor.fetchone()[0]
+            cursor.close()
+        requests_cnt = api.requests
+    return {'queries_per_sec': requests_cnt / elapsed, 'rows_per_sec': row_cnt / elapsed, 'queries': requests_cnt, 'rows': row_cnt}
+
+SCENARIOS = {
+    'parse': scenario_parse,
+    'preprocess': scenario_preprocess,
+    'fetch': scenario_fetch,
+    'insert': scenario_insert,
+    'import': scenario_import,
+    'crawl': scenario_crawl
+}
+
+def run_scenario(name, params):
+    # Runs in a fresh process, so ru_maxrss is the peak RSS of this scenario alone.
+    start = time.perf_counter()
+    metrics = SCENARIOS[name](params)
+    metrics['elapsed'] = time.perf_counter() - start
+    metrics['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return metrics
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get('results', {}).get(name, {})
+        for metric, value in metrics.items():
+            if metric not in base or not isinstance(value, (int, float)) or not base[metric]:
+                continue
+            change = value / base[metric] - 1
+            if (metric in HIGHER_IS_BETTER and change < -tolerance) or (metric in LOWER_IS_BETTER and change > tolerance):
+                regressions.append(f"{name}.{metric}: {base[metric]:,.2f} -> {value:,.2f} ({change:+.0%})")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline benchmarks of the crawler hot paths against a local API stand-in and a disposable MySQL database.')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--items', type=int, default=1000, help='items per API response')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=100000, help='rows for the insert/import scenarios')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--parse-workers', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.05, help='stand-in API latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--output', default='./docs/bench/suite.json')
+    parser.add_argument('--baseline', help='earlier results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    params = {key: value for key, value in vars(args).items() if key not in ('scenarios', 'output', 'baseline', 'tolerance')}
+    results = {}
+    for name in args.scenarios:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            try:
+                results[name] = executor.submit(run_scenario, name, params).result()
+            except Exception as e:
+                results[name] = {'error': f"{type(e).__name__}: {str(e)}"}
+        metrics = ', '.join(f"{key}={value:,.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in results[name].items())
+        print(f"{name:>10}: {metrics}")
+
+    report = {'revision': git_revision(), 'created_at': time.time(), 'python': platform.python_version(), 'params': params, 'results': results}
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
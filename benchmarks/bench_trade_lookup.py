@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from modules.data.dbm import DBM
+
+def standard_lookups(tbl, region_code, year, month):
+    month_start = f"{year}-{month:02d}-01"
+    month_end = f"{year + (month == 12)}-{month % 12 + 1:02d}-01"
+    return {
+        'region_month': (f"SELECT * FROM {tbl} WHERE region_code = %s AND contract_dte >= %s AND contract_dte < %s", (region_code, month_start, month_end)),
+        'region_year': (f"SELECT * FROM {tbl} WHERE region_code = %s AND contract_dte >= %s AND contract_dte < %s", (region_code, f"{year}-01-01", f"{year + 1}-01-01")),
+        'month_all_regions': (f"SELECT region_code, COUNT(*), AVG(py_unit) FROM {tbl} WHERE contract_dte >= %s AND contract_dte < %s GROUP BY region_code", (month_start, month_end)),
+    }
+
+def profile(dbm, lookups, repeat):
+    report = {}
+    for name, (query, params) in lookups.items():
+        result = dbm.profile_query(query, params, repeat=repeat)
+        report[name] = {
+            'latency_ms': round(result['latency_ms'], 2),
+            'rows': result['rows'],
+            'plan': [{key: row.get(key) for key in ('table', 'partitions', 'type', 'key', 'rows', 'Extra')} for row in result['plan']]
+        }
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Query plan and latency of the standard region/month lookups on trade, before and after creating the configured indexes.')
+    parser.add_argument('--db', default='atamDB')
+    parser.add_argument('--tbl', default='trade')
+    parser.add_argument('--region', default='11110')
+    parser.add_argument('--year', type=int, default=2023)
+    parser.add_argument('--month', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--apply', action='store_true', help='create the configured indexes between the two runs')
+    parser.add_argument('--output', default='./docs/bench/trade_lookup.json')
+    args = parser.parse_args()
+
+    dbm = DBM(db_name=args.db)
+    lookups = standard_lookups(args.tbl, args.region, args.year, args.month)
+    report = {'before': profile(dbm, lookups, args.repeat)}
+    if args.apply:
+        dbm.create_indexes(args.tbl)
+        report['after'] = profile(dbm, lookups, args.repeat)
+
+    for name in lookups:
+        line = f"{name:>18}: {report['before'][name]['latency_ms']:>9.2f} ms ({report['before'][name]['plan'][0]['type']})"
+        if 'after' in report:
+            line += f" -> {report['after'][name]['latency_ms']:>9.2f} ms ({report['after'][name]['plan'][0]['type']})"
+        print(line)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4, default=str)
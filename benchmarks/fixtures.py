@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import random
+import hashlib
+import threading
+
+from typing import List, Optional
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from modules.data.store import ResponseStore
+
+def synthetic_response(n_items, seed=0, total_count=None, region_code='11110', deal_year=2023, deal_month=None, result_code='000'):
+    rng = random.Random(seed)
+    items = []
+    for _ in range(n_items):
+        items.append(
+            '<item>'
+            f'<aptDong>{rng.randint(101, 120)}</aptDong>'
+            f'<aptNm>Bench Apt {rng.randint(1, 500)}(Phase {rng.randint(1, 3)})</aptNm>'
+            f'<buildYear>{rng.randint(1980, 2023)}</buildYear>'
+            f'<dealAmount>{rng.randint(10000, 300000):,}</dealAmount>'
+            f'<dealDay>{rng.randint(1, 28)}</dealDay>'
+            f'<dealMonth>{deal_month or rng.randint(1, 12)}</dealMonth>'
+            f'<dealYear>{deal_year}</dealYear>'
+            f'<excluUseAr>{rng.uniform(20, 200):.2f}</excluUseAr>'
+            f'<floor>{rng.randint(-1, 40)}</floor>'
+            f'<jibun>{rng.randint(1, 999)}</jibun>'
+            f'<sggCd>{region_code}</sggCd>'
+            f'<umdNm>Dong {rng.randint(1, 30)}</umdNm>'
+            '</item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<response><header><resultCode>{result_code}</resultCode><resultMsg>OK</resultMsg></header>'
+        f'<body><items>{"".join(items)}</items><numOfRows>{n_items}</numOfRows><pageNo>1</pageNo>'
+        f'<totalCount>{n_items if total_count is None else total_count}</totalCount></body></response>'
+    ).encode('utf-8')
+
+class FakeOpenAPI:
+    # Local stand-in for the trade API. Each (LAWD_CD, DEAL_YMD) cell deterministically holds `items_per_cell`
+    # items (or none, for an `empty_ratio` share of cells) and is paged with numOfRows/pageNo like the real service.
+    # With `recorded`, pages are served from a ResponseStore file instead. Every request sleeps
+    # latency + U(0, jitter) seconds.
+    def __init__(self, items_per_cell: int = 100, empty_ratio: float = 0.0, latency: float = 0.0, jitter: float = 0.0,
+                 recorded: Optional[str] = None, host: str = '127.0.0.1', port: int = 0):
+        self.items_per_cell = items_per_cell
+        self.empty_ratio = empty_ratio
+        self.latency = latency
+        self.jitter = jitter
+        self.store = ResponseStore(recorded) if recorded else None
+        self.requests = 0
+        self.first_request_at = None
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-openapi', daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/getRTMSDataSvcAptTrade?"
+
+    def cell_count(self, lawd_cd: str, deal_ymd: str) -> int:
+        digest = int(hashlib.md5(f"{lawd_cd}{deal_ymd}".encode()).hexdigest()[:8], 16)
+        return 0 if digest / 0xFFFFFFFF < self.empty_ratio else self.items_per_cell
+
+    def respond(self, params) -> bytes:
+        lawd_cd = params.get('LAWD_CD', [''])[0]
+        deal_ymd = params.get('DEAL_YMD', ['000000'])[0]
+        num_of_rows = int(params.get('numOfRows', ['10'])[0])
+        page_no = int(params.get('pageNo', ['1'])[0])
+        if self.store is not None:
+            content = self.store.get(lawd_cd, deal_ymd, page_no)
+            return content if content is not None else synthetic_response(0, region_code=lawd_cd)
+
+        total_count = self.cell_count(lawd_cd, deal_ymd)
+        n_items = max(min(num_of_rows, total_count - (page_no - 1) * num_of_rows), 0)
+        return synthetic_response(
+            n_items, seed=f"{lawd_cd}{deal_ymd}{page_no}", total_count=total_count,
+            region_code=lawd_cd, deal_year=int(deal_ymd[:4]), deal_month=int(deal_ymd[4:])
+        )
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with api.lock:
+                    api.requests += 1
+                    if api.first_request_at is None:
+                        api.first_request_at = time.time()
+                delay = api.latency + random.uniform(0, api.jitter)
+                if delay > 0:
+                    time.sleep(delay)
+                body = api.respond(parse_qs(urlparse(self.path).query))
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeOpenAPI':
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self.store is not None:
+            self.store.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+class DisposableDB:
+    # A throwaway MySQL database on the server from connection_configs.json, created with the configured trade and
+    # district_code schemas and dropped on exit. DBM is imported here so the API-only scenarios run without a MySQL driver.
+    def __init__(self, prefix: str = 'atam_bench', region_codes: Optional[List[str]] = None, keep: bool = False):
+        from modules.data.dbm import DBM
+        self.db_name = f"{prefix}_{os.getpid()}_{int(time.time())}"
+        self.region_codes = region_codes or [str(11110 + 10 * idx) for idx in range(25)]
+        self.keep = keep
+        self.dbm = DBM(db_name=self.db_name)
+
+    def setup(self) -> 'DisposableDB':
+        for tbl in ('district_code', 'trade'):
+            self.dbm.create_table(tbl)
+        cols = self.dbm.tbl_config['district_code']['list']
+        rows = []
+        for idx, region_code in enumerate(self.region_codes):
+            values = {'region_code': region_code, 'addr_1': 'Bench-si', 'addr_2': f"Bench-gu {idx}"}
+            rows.append([values.get(col) for col in cols])
+        self.dbm.insert_data('district_code', rows)
+        return self
+
+    def teardown(self) -> None:
+        if not self.keep:
+            self.dbm.drop_database()
+        self.dbm.dispose()
+
+    def __enter__(self):
+        return self.setup()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.teardown()
@@ -1,8 +1,7 @@
 import os
 import sys
-import json
 
-import pyacet as acet
+import pandas as pd
 
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(ROOT_DIR)
@@ -10,29 +9,88 @@ sys.path.append(ROOT_DIR)
 from modules.util.logger import Logger
 from modules.util.utils import *
 from modules.data.dbm import DBM
+from modules.data.snapshot import SnapshotStore
+from modules.analysis.stats import StatsEngine
 
 class EDA:
-    def __init__(self, db_name, import_tbl_name):
+    def __init__(self, db_name, import_tbl_name, start_date=None, end_date=None, region_codes=None, use_snapshot=True):
         self.dbm = DBM(db_name=db_name)
         self.import_tbl_name = import_tbl_name
         self.logger = Logger().get_logger(module_name='modules.analysis.eda')
         self.report_dir = './docs/eda_report'
         self.plot_dir = './images/eda_plot'
         
-        with open('./config/db/table_configs.json', 'r', encoding='utf-8') as config:
-            self.tbl_config = json.load(config)
+        self.tbl_config = load_config('./config/db/table_configs.json')
             
-        self.data = self.dbm.import_data(self.import_tbl_name, self.tbl_config[import_tbl_name]['list'], dates=self.tbl_config[import_tbl_name]['dates'])
+        self.filters = {'start_date': start_date, 'end_date': end_date, 'region_codes': region_codes}
+        self.snapshot = SnapshotStore(self.dbm, import_tbl_name)
+        self.use_snapshot = use_snapshot
+        self._data = None
+        
+    @property
+    def data(self):
+        # Loaded on first use, so summary-only reports never pull the full table.
+        if self._data is None:
+            self._data = self.load_data(self.use_snapshot)
+        return self._data
+        
+    def load_data(self, use_snapshot=True):
+        cols = self.tbl_config[self.import_tbl_name]['list']
+        dates = self.tbl_config[self.import_tbl_name]['dates']
+        if use_snapshot:
+            try:
+                if not self.snapshot.is_fresh():
+                    self.snapshot.export()
+                return self.load_snapshot(cols, dates[0])
+            except Exception as e:
+                self.logger.warning(f"Snapshot unavailable, importing from database : {str(e)}.")
+        
+        return self.dbm.import_data(self.import_tbl_name, cols, dates=dates, **self.filters)
+    
+    def load_snapshot(self, cols, date_col):
+        start_date, end_date = self.filters['start_date'], self.filters['end_date']
+        years = None
+        if start_date is not None and end_date is not None:
+            years = list(range(pd.Timestamp(start_date).year, pd.Timestamp(end_date).year + 1))
+        
+        data = self.snapshot.load(columns=cols, years=years, region_codes=self.filters['region_codes'])
+        if start_date is not None:
+            data = data[data[date_col] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            data = data[data[date_col] < pd.Timestamp(end_date)]
+        return data.reset_index(drop=True)
+        
+    def iter_data(self, call_cols=None, chunksize=100000):
+        return self.dbm.iter_data(self.import_tbl_name, call_cols or self.tbl_config[self.import_tbl_name]['list'], chunksize=chunksize, dates=self.tbl_config[self.import_tbl_name]['dates'], **self.filters)
         
     def basic_eda(self):
         try:
+            # pyacet pulls in matplotlib and seaborn, so it is only imported for the plotting report.
+            import pyacet as acet
             cols = self.tbl_config[self.import_tbl_name]['list']
             exclude_cols = self.tbl_config[self.import_tbl_name]['exclude']
             acet.ReportGenerator(input=self.data, cols=cols, output_dir=self.report_dir, dataset_name='Apartment Trade').generate_report(exclude_cols)
             acet.Visualization(input=self.data, cols=cols, output_dir=self.plot_dir).visualize(exclude_cols)
         except Exception as e:
             self.logger.error(f"Error basic eda : {str(e)}.")
+            
+    def summary_report(self):
+        # Per-(region, month) count/mean/std/min/max/quantiles from the incremental stats engine; only rows added
+        # since the last run are read from the database.
+        try:
+            engine = StatsEngine(path=f"./data/stats/{self.import_tbl_name}_stats.json", date_col=self.tbl_config[self.import_tbl_name]['dates'][0])
+            engine.refresh(self.dbm, self.import_tbl_name)
+            engine.save()
+            
+            report = engine.report()
+            os.makedirs(self.report_dir, exist_ok=True)
+            report.to_csv(os.path.join(self.report_dir, 'summary_stats.csv'), index=False, encoding='utf-8-sig')
+            return report
+        except Exception as e:
+            self.logger.error(f"Error summary report : {str(e)}.")
+            return None
         
 if __name__ == '__main__':
     eda = EDA('atamDB', 'trade')
+    eda.summary_report()
     eda.basic_eda()
\ No newline at end of file
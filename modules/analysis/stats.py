@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.logger import Logger
+from modules.data.dbm import INGEST_COL
+from modules.data.sync import sync_generations, month_range
+
+HISTOGRAM_EDGES = {
+    'price': np.linspace(0, 300000, 61).tolist(),
+    'py_unit': np.linspace(0, 5, 101).tolist(),
+    'area': np.linspace(0, 300, 61).tolist()
+}
+
+class QuantileSketch:
+    # DDSketch-style log buckets: every quantile is within `alpha` relative error, and two sketches merge by adding
+    # bucket counts, so per-(region, month) sketches can be combined into any coarser roll-up.
+    def __init__(self, alpha: float = 0.01, buckets: Optional[Dict[int, int]] = None, zero_count: int = 0):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = buckets or {}
+        self.zero_count = zero_count
+
+    def update(self, values: np.ndarray) -> None:
+        positive = values[values > 0]
+        self.zero_count += int(len(values) - len(positive))
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        self.zero_count += other.zero_count
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.zero_count + sum(self.buckets.values())
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {'alpha': self.alpha, 'zero_count': self.zero_count, 'buckets': {str(key): count for key, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'QuantileSketch':
+        return cls(data['alpha'], {int(key): count for key, count in data['buckets'].items()}, data['zero_count'])
+
+class MetricSummary:
+    def __init__(self, edges: List[float]):
+        self.edges = edges
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.histogram = [0] * (len(edges) + 1)
+        self.sketch = QuantileSketch()
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        # Bin 0 collects values below the first edge and the last bin values at or above the last edge.
+        for idx, count in zip(*np.unique(np.searchsorted(self.edges, values, side='right'), return_counts=True)):
+            self.histogram[int(idx)] += int(count)
+        self.sketch.update(values)
+
+    def merge(self, other: 'MetricSummary') -> None:
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self) -> Optional[float]:
+        if self.count < 2:
+            return None
+        return math.sqrt(max(self.total_sq - self.total ** 2 / self.count, 0.0) / (self.count - 1))
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count, 'sum': self.total, 'sum_sq': self.total_sq, 'min': self.min, 'max': self.max,
+            'histogram': self.histogram, 'sketch': self.sketch.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, edges: List[float], data: dict) -> 'MetricSummary':
+        summary = cls(edges)
+        summary.count = data['count']
+        summary.total = data['sum']
+        summary.total_sq = data['sum_sq']
+        summary.min = data['min']
+        summary.max = data['max']
+        summary.histogram = data['histogram']
+        summary.sketch = QuantileSketch.from_dict(data['sketch'])
+        return summary
+
+class StatsEngine:
+    def __init__(self, path: str = './data/stats/trade_stats.json', edges: Optional[Dict[str, List[float]]] = None, date_col: str = 'contract_dte',
+                 lag: float = 300.0):
+        self.path = path
+        self.edges = edges or HISTOGRAM_EDGES
+        self.date_col = date_col
+        self.lag = lag
+        self.summaries: Dict[Tuple[str, str], Dict[str, MetricSummary]] = {}
+        self.watermark = None
+        self.generations: Dict[Tuple[str, str], int] = {}
+        self.logger = Logger().get_logger(module_name='modules.analysis.eda')
+        self.load()
+
+    def update(self, chunk: pd.DataFrame) -> int:
+        if chunk.empty:
+            return 0
+        months = pd.to_datetime(chunk[self.date_col]).dt.strftime('%Y%m')
+        for (region_code, month), group in chunk.groupby([chunk['region_code'].astype(str), months]):
+            summary = self.summaries.setdefault((region_code, month), {metric: MetricSummary(edges) for metric, edges in self.edges.items()})
+            for metric in self.edges:
+                summary[metric].update(pd.to_numeric(group[metric], errors='coerce').to_numpy(dtype=float))
+        return len(chunk)
+
+    def refresh(self, dbm, tbl_name: str, chunksize: int = 200000, sync_tbl: Optional[str] = None) -> int:
+        # Rows carry INGEST_COL, the time they were last inserted or changed. Slices with a row stamped since the last
+        # refresh, or rewritten by a delta sync since, are dropped and re-read in full, so upserts and deletes are
+        # counted exactly once. The read starts `lag` seconds before the stored time: a transaction still open then
+        # commits rows stamped earlier than its commit. Re-reading a slice is idempotent, so the overlap costs nothing
+        # but the read. Without a stored time or the column, the summaries are rebuilt from a full scan.
+        cols = ['region_code', self.date_col] + list(self.edges)
+        generations = sync_generations(dbm, sync_tbl or f"{tbl_name}_sync")
+        changed = None
+        with dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SHOW COLUMNS FROM {tbl_name} LIKE %s", (INGEST_COL,))
+                stamped = cursor.fetchone() is not None
+                cursor.execute("SELECT NOW(6)")
+                now = cursor.fetchone()[0]
+                if stamped and self.watermark is not None:
+                    cursor.execute(
+                        f"SELECT DISTINCT region_code, DATE_FORMAT({self.date_col}, '%%Y%%m') FROM {tbl_name} "
+                        f"WHERE {INGEST_COL} >= %s - INTERVAL %s MICROSECOND",
+                        (self.watermark, int(self.lag * 1e6))
+                    )
+                    changed = {(str(region_code), month) for region_code, month in cursor.fetchall()}
+            finally:
+                cursor.close()
+
+        row_cnt = 0
+        if changed is None:
+            self.summaries = {}
+            for chunk in dbm.iter_data(tbl_name, chunksize=chunksize, query=f"SELECT {', '.join(cols)} FROM {tbl_name}"):
+                row_cnt += self.update(chunk)
+        else:
+            changed |= {key for key, generation in generations.items() if self.generations.get(key) != generation}
+            for key in changed:
+                self.summaries.pop(key, None)
+            for month in sorted({month for _, month in changed}):
+                start_date, end_date = month_range(month)
+                region_codes = sorted(region_code for region_code, deal_ym in changed if deal_ym == month)
+                query, params = dbm.build_select(tbl_name, cols, start_date, end_date, region_codes, date_col=self.date_col)
+                for chunk in dbm.iter_data(tbl_name, chunksize=chunksize, query=query, params=params):
+                    row_cnt += self.update(chunk)
+        self.watermark = str(now) if stamped else None
+        self.generations = generations
+        self.logger.info(f"Stats refresh read {row_cnt} rows from {tbl_name} (watermark: {self.watermark}, "
+                         f"rebuilt slices: {'all' if changed is None else len(changed)}).")
+        return row_cnt
+
+    def rollup(self, by: str = 'region_code') -> Dict[str, Dict[str, MetricSummary]]:
+        position = 0 if by == 'region_code' else 1
+        rolled = {}
+        for key, summary in self.summaries.items():
+            target = rolled.setdefault(key[position], {metric: MetricSummary(edges) for metric, edges in self.edges.items()})
+            for metric, metric_summary in summary.items():
+                target[metric].merge(metric_summary)
+        return rolled
+
+    def report(self, quantiles=(0.1, 0.5, 0.9)) -> pd.DataFrame:
+        rows = []
+        for (region_code, month), summary in sorted(self.summaries.items()):
+            row = {'region_code': region_code, 'month': month}
+            for metric, metric_summary in summary.items():
+                row[f"{metric}_count"] = metric_summary.count
+                row[f"{metric}_mean"] = metric_summary.mean
+                row[f"{metric}_std"] = metric_summary.std
+                row[f"{metric}_min"] = metric_summary.min if metric_summary.count else None
+                row[f"{metric}_max"] = metric_summary.max if metric_summary.count else None
+                for q in quantiles:
+                    row[f"{metric}_p{int(q * 100)}"] = metric_summary.sketch.quantile(q)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def save(self) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            'watermark': self.watermark,
+            'edges': self.edges,
+            'sync_generations': [[region_code, month, generation] for (region_code, month), generation in self.generations.items()],
+            'summaries': [
+                {'region_code': region_code, 'month': month, 'metrics': {metric: value.to_dict() for metric, value in summary.items()}}
+                for (region_code, month), summary in self.summaries.items()
+            ]
+        }
+        with open(f"{self.path}.tmp", 'w') as f:
+            json.dump(data, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data['edges'] != self.edges:
+            self.logger.warning(f"Histogram edges changed; discarding stored summaries in {self.path}.")
+            return
+        # Stores written with an id watermark are read as having none, so the next refresh rebuilds from a full scan.
+        self.watermark = data['watermark'] if isinstance(data['watermark'], str) else None
+        self.generations = {(region_code, month): generation for region_code, month, generation in data.get('sync_generations', [])}
+        self.summaries = {
+            (item['region_code'], item['month']): {metric: MetricSummary.from_dict(self.edges[metric], value) for metric, value in item['metrics'].items()}
+            for item in data['summaries']
+        }
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from typing import Iterable, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.logger import Logger
+from modules.data.dbm import DBM
+
+# Exclusive-use area bands (m2) used in Korean housing statistics; 'all' holds the whole region-month.
+SIZE_BAND_EDGES = [0, 60, 85, 135, np.inf]
+SIZE_BANDS = ['lt60', '60_85', '85_135', 'ge135']
+SUMMARY_COLUMNS = [
+    'region_code', 'district', 'deal_ym', 'size_band', 'deal_cnt',
+    'avg_py_unit', 'median_py_unit', 'avg_price', 'median_price'
+]
+
+class PriceSummary:
+    # Summary table keyed by (region_code, deal_ym, size_band), kept current by recomputing whole months:
+    # medians are not mergeable, so a touched month is rebuilt from its raw rows and swapped in atomically.
+    def __init__(self, dbm: DBM, source_tbl: str = 'trade', summary_tbl: Optional[str] = None):
+        self.dbm = dbm
+        self.source_tbl = source_tbl
+        self.summary_tbl = summary_tbl or f"{source_tbl}_summary"
+        self.logger = Logger().get_logger(module_name='modules.data.dbm')
+        self.create_table()
+
+    def create_table(self) -> None:
+        self.dbm.create_database()
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.summary_tbl} ("
+                    "region_code VARCHAR(10) NOT NULL, district VARCHAR(100) NULL, deal_ym CHAR(6) NOT NULL, size_band VARCHAR(8) NOT NULL, "
+                    "deal_cnt INT NOT NULL, avg_py_unit DOUBLE NULL, median_py_unit DOUBLE NULL, avg_price DOUBLE NULL, median_price DOUBLE NULL, "
+                    "refreshed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
+                    f"PRIMARY KEY (region_code, deal_ym, size_band), KEY idx_{self.summary_tbl}_ym (deal_ym, size_band))"
+                )
+                conn.commit()
+            finally:
+                cursor.close()
+
+    def aggregate(self, data: pd.DataFrame, deal_ym: str) -> pd.DataFrame:
+        bands = pd.cut(data['area'], bins=SIZE_BAND_EDGES, labels=SIZE_BANDS, right=False).astype(object)
+        banded = pd.concat([data.assign(size_band=bands), data.assign(size_band='all')], ignore_index=True)
+
+        summary = banded.groupby(['region_code', 'size_band']).agg(
+            district=('district', 'first'),
+            deal_cnt=('price', 'size'),
+            avg_py_unit=('py_unit', 'mean'),
+            median_py_unit=('py_unit', 'median'),
+            avg_price=('price', 'mean'),
+            median_price=('price', 'median')
+        ).reset_index()
+        summary['deal_ym'] = deal_ym
+        return summary[SUMMARY_COLUMNS]
+
+    def refresh(self, months: Optional[Iterable[str]] = None) -> int:
+        # Recomputes only the given YYYYMM months (all months in the source table when None).
+        months = sorted(set(months)) if months is not None else self.source_months()
+        cols = ['region_code', 'district', 'contract_dte', 'area', 'price', 'py_unit']
+        start = time.perf_counter()
+        row_cnt = 0
+        for deal_ym in months:
+            month_start = pd.Timestamp(f"{deal_ym}01")
+            month_end = month_start + pd.offsets.MonthBegin(1)
+            data = self.dbm.import_data(self.source_tbl, cols, start_date=month_start.strftime('%Y-%m-%d'), end_date=month_end.strftime('%Y-%m-%d'))
+            if data is None:
+                self.logger.warning(f"Skipping summary refresh of {deal_ym}: source rows could not be read.")
+                continue
+            for col in ('area', 'price', 'py_unit'):
+                data[col] = pd.to_numeric(data[col], errors='coerce')
+            summary = self.aggregate(data, deal_ym) if not data.empty else pd.DataFrame(columns=SUMMARY_COLUMNS)
+            rows = summary.astype(object).where(summary.notna(), None).values.tolist()
+            self.replace_month(deal_ym, rows)
+            row_cnt += len(rows)
+        self.logger.info(f"Refresh {self.summary_tbl} for {len(months)} months: {row_cnt} rows ({time.perf_counter() - start:.1f}s).")
+        return row_cnt
+
+    def replace_month(self, deal_ym: str, rows: List[list]) -> None:
+        # Delete and insert share one transaction, so readers see either the old or the new month.
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"DELETE FROM {self.summary_tbl} WHERE deal_ym = %s", (deal_ym,))
+                if rows:
+                    cursor.executemany(
+                        f"INSERT INTO {self.summary_tbl} ({', '.join(SUMMARY_COLUMNS)}) VALUES ({', '.join(['%s'] * len(SUMMARY_COLUMNS))})",
+                        rows
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def source_months(self) -> List[str]:
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT DISTINCT DATE_FORMAT(contract_dte, '%Y%m') FROM {self.source_tbl}")
+                return sorted(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.close()
+
+    def query(self, region_codes: Optional[List[str]] = None, start_ym: Optional[str] = None, end_ym: Optional[str] = None, size_band: str = 'all') -> pd.DataFrame:
+        clauses, params = ["size_band = %s"], [size_band]
+        if region_codes:
+            clauses.append(f"region_code IN ({', '.join(['%s'] * len(region_codes))})")
+            params.extend(region_codes)
+        if start_ym is not None:
+            clauses.append("deal_ym >= %s")
+            params.append(start_ym)
+        if end_ym is not None:
+            clauses.append("deal_ym <= %s")
+            params.append(end_ym)
+
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM {self.summary_tbl} WHERE {' AND '.join(clauses)} ORDER BY region_code, deal_ym", params)
+                return pd.DataFrame.from_records(cursor.fetchall(), columns=SUMMARY_COLUMNS)
+            finally:
+                cursor.close()
@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+import random
+import threading
+
+from typing import Callable, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.logger import Logger
+from modules.util.metrics import metrics
+from modules.data.parser import read_result_code, SUCCESS_CODES, NODATA_CODES
+
+# data.go.kr result codes. Successful and no-data responses are the parser's business; everything else decides
+# whether the call is retried, slows the crawl down, or takes the service key out of rotation.
+OK_CODES = SUCCESS_CODES | NODATA_CODES
+THROTTLE_CODES = {'22'}
+KEY_ERROR_CODES = {'20', '21', '30', '31', '32', '33'}
+FATAL_CODES = {'10', '11', '12'}
+
+class RequestFailed(Exception):
+    def __init__(self, outcome: str, detail: str):
+        super().__init__(f"{outcome}: {detail}")
+        self.outcome = outcome
+
+def classify_content(content: bytes) -> Tuple[str, str]:
+    result_code = read_result_code(content)
+    if result_code in OK_CODES:
+        return 'ok', result_code
+    if result_code in THROTTLE_CODES:
+        return 'throttled', result_code
+    if result_code in KEY_ERROR_CODES:
+        return 'key_error', result_code
+    if result_code in FATAL_CODES:
+        return 'fatal', result_code
+    return 'retry', result_code
+
+def classify_error(error: Exception) -> str:
+    # Timeouts and connection errors carry no response and are retried like 5xx.
+    status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status_code is None or status_code >= 500:
+        return 'retry'
+    if status_code == 429:
+        return 'throttled'
+    if status_code in (401, 403):
+        return 'key_error'
+    return 'fatal'
+
+class AIMDLimiter:
+    # Caps requests in flight across fetch and page threads. The limit grows by about one per limit's worth of
+    # successful calls under latency_target and is multiplied by `decrease` on congestion (throttling, errors,
+    # slow calls), at most once per cooldown so a burst of failures from one window only counts once.
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 16, latency_target: float = 3.0, decrease: float = 0.5, cooldown: float = 1.0):
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self.cond:
+            while self.inflight >= int(self.limit):
+                self.cond.wait()
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.inflight -= 1
+                self.cond.notify()
+
+    def on_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            self.on_congestion()
+            return
+        with self.cond:
+            self.limit = min(self.limit + 1.0 / self.limit, self.max_limit)
+            self.cond.notify_all()
+        metrics.set('api_concurrency_limit', self.limit)
+
+    def on_congestion(self) -> None:
+        with self.cond:
+            now = time.monotonic()
+            if now - self.last_decrease < self.cooldown:
+                return
+            self.last_decrease = now
+            self.limit = max(self.limit * self.decrease, self.min_limit)
+        metrics.set('api_concurrency_limit', self.limit)
+
+class CircuitBreaker:
+    # closed -> open after `threshold` consecutive failures (or at once on trip) -> half_open after the timeout,
+    # which lets one probe through per timeout. A failed probe reopens with the timeout doubled up to max_timeout.
+    def __init__(self, threshold: int = 5, reset_timeout: float = 60.0, max_timeout: float = 3600.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            now = time.monotonic()
+            if now < self.retry_at:
+                return False
+            # Also covers a probe that never reported back (e.g. its quota reservation failed).
+            self.state = 'half_open'
+            self.retry_at = now + self.timeout
+            return True
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.timeout = self.reset_timeout
+
+    def record_failure(self, trip: bool = False, timeout: Optional[float] = None) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open':
+                self.timeout = min(self.timeout * 2, self.max_timeout)
+            elif not trip and self.failures < self.threshold:
+                return
+            self.state = 'open'
+            self.retry_at = time.monotonic() + (timeout or self.timeout)
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        # Full jitter: retries from many threads spread out instead of arriving together.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class RequestController:
+    # Runs one API call through the limiter, retry policy and the per-key circuit breakers. `acquire_key` picks a
+    # key (APIManager consults `available`), `send` performs the HTTP request and raises on HTTP errors.
+    def __init__(self, limiter: AIMDLimiter, retry: RetryPolicy, breaker_threshold: int = 5, breaker_reset: float = 60.0,
+                 on_throttled: Optional[Callable[[str, str], None]] = None):
+        self.limiter = limiter
+        self.retry = retry
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.on_throttled = on_throttled
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+        self.logger = Logger().get_logger(module_name='modules.data.crawler')
+
+    def breaker(self, service_key: str) -> CircuitBreaker:
+        with self.lock:
+            if service_key not in self.breakers:
+                self.breakers[service_key] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return self.breakers[service_key]
+
+    def available(self, service_key: str) -> bool:
+        return self.breaker(service_key).allow()
+
+    def next_retry(self, service_keys: List[str]) -> float:
+        # Seconds until the first open breaker among service_keys lets a probe through.
+        retry_at = min((self.breaker(service_key).retry_at for service_key in service_keys), default=time.monotonic())
+        return max(retry_at - time.monotonic(), 0.0)
+
+    def execute(self, send: Callable[[str], bytes], acquire_key: Callable[[], str], key_label: Callable[[str], str] = str) -> bytes:
+        error = None
+        for attempt in range(self.retry.max_retries + 1):
+            service_key = acquire_key()
+            breaker = self.breaker(service_key)
+            start = time.monotonic()
+            with self.limiter.slot():
+                try:
+                    content = send(service_key)
+                    outcome, detail = classify_content(content)
+                except Exception as e:
+                    outcome, detail = classify_error(e), str(e)
+            latency = time.monotonic() - start
+
+            if outcome == 'ok':
+                breaker.record_success()
+                self.limiter.on_success(latency)
+                return content
+
+            metrics.inc('api_failures', labels={'key': key_label(service_key), 'outcome': outcome})
+            error = RequestFailed(outcome, detail)
+            if outcome == 'fatal':
+                break
+            if outcome == 'key_error':
+                breaker.record_failure(trip=True, timeout=breaker.max_timeout)
+                self.logger.warning(f"Service key {key_label(service_key)} rejected ({detail}); out of rotation for {breaker.max_timeout:.0f}s.")
+            elif outcome == 'throttled':
+                breaker.record_failure(trip=True)
+                self.limiter.on_congestion()
+                if self.on_throttled is not None:
+                    self.on_throttled(service_key, detail)
+            else:
+                breaker.record_failure()
+                self.limiter.on_congestion()
+            if attempt < self.retry.max_retries:
+                metrics.inc('api_retries', labels={'outcome': outcome})
+                time.sleep(self.retry.delay(attempt))
+        raise error
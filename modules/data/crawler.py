@@ -1,21 +1,44 @@
-import re
 import os
 import sys
-import json
+import math
 import time
+import socket
+import logging
+import argparse
 import requests
+import threading
+import itertools
+import multiprocessing
 import datetime as dt
 
-from typing import List, Dict, Any, Tuple
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
+import pandas as pd
+
+from queue import Queue
+from typing import List, Dict, Tuple, Optional
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(ROOT_DIR)
 
-from modules.util.logger import Logger
+from modules.util.logger import Logger, RateLimitedLog
 from modules.util.utils import *
+from modules.util.metrics import metrics, MetricsExporter, SIZE_BUCKETS
 from modules.data.dbm import DBM
+from modules.data.parser import read_total_count, SUCCESS_CODES, NODATA_CODES
+from modules.data.preprocessor import Preprocessor, TRADE_COLUMNS, TRADE_NATURAL_KEY
+from modules.data.writer import WriteBehindBuffer
+from modules.data.store import ResponseStore
+from modules.data.ledger import TaskLedger, DBTaskLedger
+from modules.data.quota import QuotaLedger, DBQuotaLedger
+from modules.data.control import AIMDLimiter, RetryPolicy, RequestController
+from modules.data.emptiness import EmptinessIndex
+from modules.data.aggregate import PriceSummary
+from modules.data.dimension import CompactTrade, SOURCE_COLUMNS
+from modules.data.sync import DeltaSync, trailing_months
+from modules.data.district import DistrictSnapshot
+from modules.data.pipeline import STOP, ParsedBatch, StageStats, PipelineMonitor, parse_content, init_parse_worker, parse_in_worker, put_until, iter_queue
 
 @dataclass
 class Config:
@@ -25,26 +48,176 @@ class Config:
     END_YEAR: int
     API_CONFIG_PATH: str = './config/openapi/openapi_configs.json'
     TBL_CONFIG_PATH: str = './config/db/table_configs.json'
-    PROGRESS_FILE: str = './config/openapi/api_progress.json'
+    LEDGER_PATH: str = './config/openapi/task_ledger.sqlite3'
+    MAX_ATTEMPTS: int = 3
+    LEDGER_BACKEND: str = 'sqlite'
+    QUOTA_BACKEND: str = 'sqlite'
+    QUOTA_PATH: str = './config/openapi/quota_ledger.sqlite3'
+    WORKER_ID: Optional[str] = None
+    LEASE_TIMEOUT: float = 3600.0
+    CONCURRENCY: int = 4
+    KEY_RATE_LIMIT: float = 10.0
+    REQUEST_TIMEOUT: float = 30.0
+    CONNECT_TIMEOUT: float = 5.0
+    MAX_RETRIES: int = 3
+    RETRY_BASE_DELAY: float = 0.5
+    RETRY_MAX_DELAY: float = 30.0
+    LATENCY_TARGET: float = 3.0
+    MAX_INFLIGHT: Optional[int] = None
+    BREAKER_THRESHOLD: int = 5
+    BREAKER_RESET: float = 60.0
+    FLUSH_ROWS: int = 50000
+    FLUSH_INTERVAL: float = 60.0
+    BULK_METHOD: str = 'values'
+    UPSERT: bool = True
+    DEFER_INDEXES: bool = False
+    STORE_RAW: bool = True
+    RAW_STORE_PATH: str = './data/raw/responses.sqlite3'
+    RAW_STORE_TTL_DAYS: Optional[float] = None
+    REFRESH_SUMMARY: bool = True
+    COMPACT_LAYOUT: bool = False
+    PARSE_WORKERS: int = 2
+    WRITE_WORKERS: int = 1
+    QUEUE_SIZE: int = 32
+    REPORT_INTERVAL: float = 30.0
+    PAGE_ROWS_MIN: int = 100
+    PAGE_ROWS_MAX: int = 1000
+    PAGE_CONCURRENCY: int = 4
+    SKIP_EMPTY: bool = True
+    EMPTY_INDEX_PATH: str = './config/openapi/emptiness_index.json'
+    EMPTY_MIN_OBSERVED: int = 24
+    EMPTY_DEFER_THRESHOLD: float = 0.9
+    EMPTY_WINDOW: int = 36
+    VERIFY_MONTHS: int = 3
+    VERIFY_BUDGET: Optional[int] = None
+    METRICS_PATH: Optional[str] = './data/metrics/crawler_{worker_id}.json'
+    METRICS_FORMAT: str = 'json'
+    METRICS_INTERVAL: float = 30.0
+    WARN_INTERVAL: float = 60.0
+    SYNC_MONTHS: int = 3
+    DISTRICT_SNAPSHOT: bool = True
+    DISTRICT_SNAPSHOT_PATH: Optional[str] = None
+    DISTRICT_SNAPSHOT_MAX_AGE: float = 7 * 86400.0
 
     def validate(self):
         assert os.path.exists(self.API_CONFIG_PATH), f"API config file not found: {self.API_CONFIG_PATH}"
         assert os.path.exists(self.TBL_CONFIG_PATH), f"Table config file not found: {self.TBL_CONFIG_PATH}"
         assert self.START_YEAR <= self.END_YEAR, f"Invalid year range: {self.START_YEAR} to {self.END_YEAR}"
+        assert self.CONCURRENCY >= 1, f"Invalid concurrency: {self.CONCURRENCY}"
+        assert self.PARSE_WORKERS >= 0, f"Invalid parse workers: {self.PARSE_WORKERS}"
+        assert self.WRITE_WORKERS >= 1, f"Invalid write workers: {self.WRITE_WORKERS}"
+        assert self.QUEUE_SIZE >= 1, f"Invalid queue size: {self.QUEUE_SIZE}"
+        assert 0 < self.PAGE_ROWS_MIN <= self.PAGE_ROWS_MAX, f"Invalid page size range: {self.PAGE_ROWS_MIN} to {self.PAGE_ROWS_MAX}"
+        assert self.PAGE_CONCURRENCY >= 1, f"Invalid page concurrency: {self.PAGE_CONCURRENCY}"
+        assert self.KEY_RATE_LIMIT > 0, f"Invalid rate limit per key: {self.KEY_RATE_LIMIT}"
+        assert self.REQUEST_TIMEOUT > 0 and self.CONNECT_TIMEOUT > 0, f"Invalid timeouts: {self.CONNECT_TIMEOUT}, {self.REQUEST_TIMEOUT}"
+        assert self.MAX_RETRIES >= 0, f"Invalid max retries: {self.MAX_RETRIES}"
+        assert 0 <= self.RETRY_BASE_DELAY <= self.RETRY_MAX_DELAY, f"Invalid retry delays: {self.RETRY_BASE_DELAY} to {self.RETRY_MAX_DELAY}"
+        assert self.LATENCY_TARGET > 0, f"Invalid latency target: {self.LATENCY_TARGET}"
+        assert self.MAX_INFLIGHT is None or self.MAX_INFLIGHT >= 1, f"Invalid max in-flight requests: {self.MAX_INFLIGHT}"
+        assert self.BREAKER_THRESHOLD >= 1 and self.BREAKER_RESET > 0, f"Invalid circuit breaker: {self.BREAKER_THRESHOLD}, {self.BREAKER_RESET}"
+        assert self.BULK_METHOD in ('values', 'infile'), f"Invalid bulk insert method: {self.BULK_METHOD}"
+        assert self.LEDGER_BACKEND in ('sqlite', 'mysql'), f"Invalid task ledger backend: {self.LEDGER_BACKEND}"
+        assert self.QUOTA_BACKEND in ('local', 'sqlite', 'mysql'), f"Invalid quota ledger backend: {self.QUOTA_BACKEND}"
+        assert self.METRICS_FORMAT in ('json', 'prometheus'), f"Invalid metrics format: {self.METRICS_FORMAT}"
+        assert self.METRICS_INTERVAL > 0, f"Invalid metrics interval: {self.METRICS_INTERVAL}"
+        assert self.WARN_INTERVAL >= 0, f"Invalid warning interval: {self.WARN_INTERVAL}"
+        assert self.VERIFY_MONTHS >= 1, f"Invalid verify months: {self.VERIFY_MONTHS}"
+        assert self.VERIFY_BUDGET is None or self.VERIFY_BUDGET >= 0, f"Invalid verify budget: {self.VERIFY_BUDGET}"
+        assert self.SYNC_MONTHS >= 1, f"Invalid sync window: {self.SYNC_MONTHS}"
+        assert 1 <= self.EMPTY_MIN_OBSERVED <= self.EMPTY_WINDOW, f"Invalid emptiness window: {self.EMPTY_MIN_OBSERVED} of {self.EMPTY_WINDOW}"
+        assert 0 < self.EMPTY_DEFER_THRESHOLD <= self.EMPTY_WINDOW / (self.EMPTY_WINDOW + 2), f"Unreachable defer threshold for a {self.EMPTY_WINDOW} month window: {self.EMPTY_DEFER_THRESHOLD}"
+
+@dataclass
+class Query:
+    region_code: str
+    deal_ymd: str
+    num_of_rows: int = 1000
+    page_no: int = 1
+
+    def to_url(self, service_url: str, service_key: str) -> str:
+        return (
+            service_url +
+            'serviceKey=' + service_key +
+            '&LAWD_CD=' + self.region_code +
+            '&DEAL_YMD=' + self.deal_ymd +
+            '&numOfRows=' + str(self.num_of_rows) +
+            '&pageNo=' + str(self.page_no)
+        )
 
 class APIManager:
-    def __init__(self, service_keys: List[str]):
+    def __init__(self, service_keys: List[str], rate_limit: float = 10.0, quota_ledger=None, controller: Optional[RequestController] = None):
         self.service_keys = service_keys
         self.key_usage = {key: 0 for key in self.service_keys}
         self.max_key_usage = 10000
         self.current_key_idx = 0
         self.last_reset_date = dt.datetime.now().date()
+        self.min_interval = 1.0 / rate_limit
+        self.next_call_time = {key: 0.0 for key in self.service_keys}
+        self.quota_ledger = quota_ledger
+        self.controller = controller
+        self.lock = threading.Lock()
         self.logger = Logger().get_logger(module_name='modules.data.crawler')
 
     def get_next_service_key(self) -> str:
         self.current_key_idx = (self.current_key_idx + 1) % len(self.service_keys)
         return self.service_keys[self.current_key_idx]
 
+    def acquire_service_key(self) -> str:
+        # Reserve one call on a key below max_key_usage, then wait for that key's rate-limit slot outside the lock.
+        with self.lock:
+            while True:
+                self.reset_key_usage()
+                service_key = self.reserve_next_key()
+                if service_key is not None:
+                    break
+                self.wait_available_key()
+
+            call_time = max(time.monotonic(), self.next_call_time[service_key])
+            self.next_call_time[service_key] = call_time + self.min_interval
+
+        delay = call_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return service_key
+
+    def reserve_next_key(self) -> Optional[str]:
+        # With a shared quota ledger the reservation is made there, so processes sharing the key pool can never
+        # over-issue; key_usage stays as the local view and marks keys other workers have exhausted.
+        for _ in range(len(self.service_keys)):
+            service_key = self.get_next_service_key()
+            if self.key_usage[service_key] >= self.max_key_usage:
+                continue
+            if self.controller is not None and not self.controller.available(service_key):
+                continue
+            if self.quota_ledger is None or self.quota_ledger.reserve(service_key, self.max_key_usage):
+                self.key_usage[service_key] += 1
+                metrics.inc('api_key_calls', labels={'key': self.key_label(service_key)})
+                metrics.set('api_key_quota_remaining', self.max_key_usage - self.key_usage[service_key], labels={'key': self.key_label(service_key)})
+                return service_key
+            self.key_usage[service_key] = self.max_key_usage
+        return None
+
+    @staticmethod
+    def key_label(service_key: str) -> str:
+        # Only the tail of a key goes into metrics files, enough to tell keys apart without publishing them.
+        return f"...{service_key[-6:]}"
+
+    def exhaust(self, service_key: str) -> None:
+        # The API reported the key's daily quota as spent (e.g. calls made outside this crawler).
+        with self.lock:
+            self.key_usage[service_key] = self.max_key_usage
+
+    def wait_available_key(self) -> None:
+        # Keys with quota left but an open circuit breaker come back after their breaker timeout, not at midnight.
+        open_keys = [key for key in self.service_keys if self.key_usage[key] < self.max_key_usage]
+        if self.controller is None or not open_keys:
+            self.wait_next_day()
+            return
+        wait_time = max(self.controller.next_retry(open_keys), 0.1)
+        self.logger.warning(f"All service keys are backing off. Waiting {wait_time:.1f}s.")
+        time.sleep(wait_time)
+
     def reset_key_usage(self) -> None:
         today = dt.datetime.now().date()
         if today > self.last_reset_date:
@@ -58,216 +231,595 @@ class APIManager:
         time.sleep(wait_time)
         self.reset_key_usage()
 
-class ProgressManager:
-    def __init__(self, progress_file: str):
-        self.progress_file = progress_file
-        self.progress = self.load_progress()
-
-    def load_progress(self) -> Dict[str, int]:
-        try:
-            with open(self.progress_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {'last_district': 0, 'last_date': 0}
-
-    def save_progress(self) -> None:
-        with open(self.progress_file, 'w') as f:
-            json.dump(self.progress, f)
-
 class Crawler:
     def __init__(self, config: Config):
         self.config = config
         self.config.validate()
         self.dbm = DBM(db_name=config.DB_NAME)
         self.logger = Logger().get_logger(module_name='modules.data.crawler')
+        self.dropped_log = RateLimitedLog(self.logger, interval=config.WARN_INTERVAL)
         
-        with open(config.API_CONFIG_PATH, 'r') as config_file:
-            self.api_config = json.load(config_file)
+        self.api_config = load_config(config.API_CONFIG_PATH)
+        self.tbl_config = load_config(config.TBL_CONFIG_PATH)
             
-        with open(config.TBL_CONFIG_PATH, 'r', encoding='utf8') as config_file:
-            self.tbl_config = json.load(config_file)
-            
-        self.district_code = self.dbm.import_data(tbl_name=config.IMPORT_TBL_NAME, call_cols=self.tbl_config[config.IMPORT_TBL_NAME]['list'])
-        self.api_manager = APIManager(self.api_config['service_key'])
-        self.progress_manager = ProgressManager(config.PROGRESS_FILE)
+        self.district_code = self.load_district_code()
+        self.preprocessor = Preprocessor(self.district_code)
+        self.worker_id = config.WORKER_ID or socket.gethostname()
+        self.request_controller = self.set_request_controller()
+        self.api_manager = APIManager(self.api_config['service_key'], rate_limit=config.KEY_RATE_LIMIT, quota_ledger=self.set_quota_ledger(), controller=self.request_controller)
+        self.task_ledger = self.set_task_ledger()
+        self.date_list = date_generator(config.START_YEAR, config.END_YEAR)
+        self.touched_months = set()
+        self.compact = None
+        self.expected_rows = {}
+        self.page_executor = ThreadPoolExecutor(max_workers=config.PAGE_CONCURRENCY, thread_name_prefix='crawler-page')
+        self.emptiness = EmptinessIndex(config.EMPTY_INDEX_PATH, config.EMPTY_MIN_OBSERVED, config.EMPTY_DEFER_THRESHOLD, config.EMPTY_WINDOW) if config.SKIP_EMPTY else None
+        self.empty_plan = {'fetch': [], 'defer': [], 'skip': []}
+        self.http = threading.local()
+        self.response_store = ResponseStore(config.RAW_STORE_PATH, ttl_days=config.RAW_STORE_TTL_DAYS) if config.STORE_RAW else None
+        if self.response_store is not None:
+            evicted = self.response_store.evict_expired()
+            if evicted:
+                self.logger.info(f"Evicted {evicted} expired raw responses from {config.RAW_STORE_PATH}.")
 
-    def set_query_list(self) -> List[str]:
-        date_list = date_generator(self.config.START_YEAR, self.config.END_YEAR)
-        
-        query_cnt = 0
-        query_list = []
-        for district in range(self.progress_manager.progress['last_district'], len(self.district_code)):
+    def load_district_code(self) -> pd.DataFrame:
+        # The local snapshot lets the crawler reach its first request without querying district_code.
+        if self.config.DISTRICT_SNAPSHOT:
             try:
-                district_data = self.district_code.iloc[district]
-                for date in range(self.progress_manager.progress['last_date'], len(date_list)):
-                    service_key = self.api_manager.get_next_service_key()
-                    
-                    query_params = (
-                        self.api_config['service_url'] +
-                        'serviceKey=' + service_key +
-                        '&LAWD_CD=' + str(district_data['region_code']) +
-                        '&DEAL_YMD=' + str(date_list[date]) +
-                        '&numOfRows=' + str(10000)
-                    )
-                    
-                    query_cnt += 1
-                    query_list.append(query_params)
-                
-                self.progress_manager.progress['last_district'] = district
-                self.progress_manager.progress['last_date'] = 0
-                self.progress_manager.save_progress()
-                
-                self.logger.info(f"[{district + 1} / {len(self.district_code)}] {district_data['addr_2']} Set query lists: [{query_cnt} Objects]")
+                return DistrictSnapshot(self.dbm, self.config.IMPORT_TBL_NAME, self.config.DISTRICT_SNAPSHOT_PATH, max_age=self.config.DISTRICT_SNAPSHOT_MAX_AGE).load()
             except Exception as e:
-                self.logger.error(f"Error setting query lists for district {district}: {str(e)}")
+                self.logger.warning(f"District snapshot unavailable, importing from database : {str(e)}.")
+        return self.dbm.import_data(tbl_name=self.config.IMPORT_TBL_NAME, call_cols=self.tbl_config[self.config.IMPORT_TBL_NAME]['list'])
+
+    def set_task_ledger(self):
+        if self.config.LEDGER_BACKEND == 'mysql':
+            return DBTaskLedger(self.dbm, worker_id=self.worker_id, lease_timeout=self.config.LEASE_TIMEOUT)
+        return TaskLedger(self.config.LEDGER_PATH, worker_id=self.worker_id, lease_timeout=self.config.LEASE_TIMEOUT)
+
+    def set_quota_ledger(self):
+        if self.config.QUOTA_BACKEND == 'mysql':
+            return DBQuotaLedger(self.dbm)
+        if self.config.QUOTA_BACKEND == 'sqlite':
+            return QuotaLedger(self.config.QUOTA_PATH)
+        return None
+
+    def set_request_controller(self) -> RequestController:
+        # In-flight calls start at CONCURRENCY and may grow into the page fan-out while the API keeps up.
+        limiter = AIMDLimiter(
+            self.config.CONCURRENCY, max_limit=self.config.MAX_INFLIGHT or self.config.CONCURRENCY + self.config.PAGE_CONCURRENCY,
+            latency_target=self.config.LATENCY_TARGET
+        )
+        retry = RetryPolicy(self.config.MAX_RETRIES, self.config.RETRY_BASE_DELAY, self.config.RETRY_MAX_DELAY)
+        return RequestController(limiter, retry, self.config.BREAKER_THRESHOLD, self.config.BREAKER_RESET, on_throttled=self.on_throttled)
+
+    def on_throttled(self, service_key: str, result_code: str) -> None:
+        if result_code == '22':
+            self.api_manager.exhaust(service_key)
+            self.logger.warning(f"Service key {self.api_manager.key_label(service_key)} hit the API's daily limit.")
+
+    def get_session(self) -> requests.Session:
+        if not hasattr(self.http, 'session'):
+            self.http.session = requests.Session()
+        return self.http.session
+
+    def set_query_list(self) -> int:
+        # Seeds one ledger task per (district, month); existing tasks keep their state, so a restart only
+        # re-queues work that was in flight when the previous run stopped and failures below MAX_ATTEMPTS.
+        region_codes = self.district_code['region_code'].astype(str).tolist()
+        seeded = self.task_ledger.seed(region_codes, self.date_list)
+        recovered = self.task_ledger.recover()
+        retried = self.task_ledger.retry_failed(self.config.MAX_ATTEMPTS)
+        self.expected_rows.update(self.task_ledger.max_item_counts())
+        deferred = self.plan_queries(region_codes)
+        counts = self.task_ledger.counts(self.date_list[0], self.date_list[-1])
         
-        self.logger.info(f"Total queries generated: {len(query_list)}")
-        return query_list
+        self.logger.info(f"Task ledger: [{seeded} Seeded] [{recovered} Recovered] [{retried} Retried] [{deferred} Deferred] {counts}")
+        return counts['pending']
 
-    def api_pipeline(self, query):
-        self.api_manager.reset_key_usage()
+    def plan_queries(self, region_codes: List[str]) -> int:
+        # Deferrals left by the previous run are re-planned against the index refreshed with the latest history.
+        start_ymd, end_ymd = self.date_list[0], self.date_list[-1]
+        if self.emptiness is None:
+            return self.task_ledger.defer([], start_ymd, end_ymd)
+        self.emptiness.update(self.task_ledger.history())
+        self.empty_plan = self.emptiness.plan(region_codes)
+        return self.task_ledger.defer(self.empty_plan['skip'] + self.empty_plan['defer'], start_ymd, end_ymd)
 
-        current_key = self.api_manager.service_keys[self.api_manager.current_key_idx]
-        if self.api_manager.key_usage[current_key] >= self.api_manager.max_key_usage:
-            if all(usage >= self.api_manager.max_key_usage for usage in self.api_manager.key_usage.values()):
-                self.api_manager.wait_next_day()
-            else:
-                current_key = self.api_manager.get_next_service_key()
+    def verify_deferred(self, write_tbl) -> int:
+        # Runs after the main pass: the latest month of each 'skip' region and the latest VERIFY_MONTHS months of each
+        # 'defer' region, together at most VERIFY_BUDGET calls. A region whose probes find trades gets all of its
+        # deferred months back in this crawl; the rest stay deferred.
+        if self.emptiness is None:
+            return 0
+        start_ymd, end_ymd = self.date_list[0], self.date_list[-1]
+        budget = self.config.VERIFY_BUDGET
+        probes = self.task_ledger.release(start_ymd, end_ymd, self.empty_plan['skip'], limit=budget, per_region=1)
+        probes += self.task_ledger.release(start_ymd, end_ymd, self.empty_plan['defer'], limit=None if budget is None else budget - len(probes), per_region=self.config.VERIFY_MONTHS)
+        observe_data_cnt = self.run_pipeline(self.iter_queries(), write_tbl, len(probes)) if probes else 0
         
+        found = sorted({region_code for (region_code, _), item_cnt in self.task_ledger.item_counts(probes).items() if item_cnt})
+        if found:
+            released = len(self.task_ledger.release(start_ymd, end_ymd, found))
+            self.logger.warning(f"Regions predicted empty had trades: {found}; crawling their {released} deferred months.")
+            observe_data_cnt += self.run_pipeline(self.iter_queries(), write_tbl, released)
+        return observe_data_cnt
+
+    def report_emptiness(self, counts: Dict[str, int]) -> None:
+        if self.emptiness is None:
+            return
+        self.emptiness.update(self.task_ledger.history())
+        self.emptiness.record({
+            'start_ymd': self.date_list[0], 'end_ymd': self.date_list[-1], 'calls_saved': counts['deferred'],
+            'skip_regions': len(self.empty_plan['skip']), 'defer_regions': len(self.empty_plan['defer'])
+        })
+        self.emptiness.save()
+        self.logger.info(f"Emptiness index saved {counts['deferred']} calls ({len(self.empty_plan['skip'])} skipped, {len(self.empty_plan['defer'])} deferred regions).")
+
+    def iter_queries(self):
+        batch_size = self.config.CONCURRENCY * 2
+        while True:
+            tasks = self.task_ledger.claim(batch_size, self.date_list[0], self.date_list[-1])
+            if not tasks:
+                return
+            for region_code, deal_ymd in tasks:
+                yield Query(region_code=region_code, deal_ymd=deal_ymd, num_of_rows=self.page_size(region_code))
+
+    def page_size(self, region_code: str) -> int:
+        # Sized from the largest totalCount seen for the district, so a typical month fits on the first page without
+        # asking for a 10000-row payload; unseen districts start at PAGE_ROWS_MIN and grow as counts come in.
+        expected = self.expected_rows.get(region_code, 0) * 1.2
+        return int(min(max(math.ceil(expected / 100) * 100, self.config.PAGE_ROWS_MIN), self.config.PAGE_ROWS_MAX))
+
+    def fetch(self, query: Query) -> bytes:
+        # Retries, backoff, in-flight limits and per-key circuit breakers live in the request controller.
+        return self.request_controller.execute(lambda service_key: self.send(query, service_key), self.api_manager.acquire_service_key, self.api_manager.key_label)
+
+    def send(self, query: Query, service_key: str) -> bytes:
+        labels = {'key': self.api_manager.key_label(service_key)}
+        start = time.perf_counter()
         try:
-            response = requests.get(query)
+            response = self.get_session().get(query.to_url(self.api_config['service_url'], service_key), timeout=(self.config.CONNECT_TIMEOUT, self.config.REQUEST_TIMEOUT))
             response.raise_for_status()
-            self.api_manager.key_usage[current_key] += 1
-            
+        except Exception:
+            metrics.inc('api_errors', labels=labels)
+            raise
+        finally:
+            metrics.observe('fetch_seconds', time.perf_counter() - start, labels)
+        
+        content = response.content
+        metrics.observe('fetch_bytes', len(content), labels, buckets=SIZE_BUCKETS)
+        metrics.inc('api_items', content.count(b'<item>'), labels)
+        
+        # Decoding and formatting a multi-MB body is only worth it when debug records are actually emitted.
+        if self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(f"API Response: {response.text}")
-            
-            soup = BeautifulSoup(response.content, 'lxml-xml')
-            result_code = soup.find('resultCode').text if soup.find('resultCode') else 'Unknown'
-            result_msg = soup.find('resultMsg').text if soup.find('resultMsg') else 'Unknown'
-            total_count = int(soup.find('totalCount').text) if soup.find('totalCount') else 0
-            
-            if result_code != '000':
-                self.logger.warning(f"API request failed. Result code: {result_code}, Message: {result_msg}")
-                return [], 0, False
+        
+        return content
 
-            item_list = soup.find_all('item')
-            
-            if not item_list or total_count != len(item_list):
-                self.logger.info(f"No data returned from API. Result code: {result_code}, Message: {result_msg}, Total count: {total_count}")
-                return [], 0, True
-
-            insert_list = []
-            for item in item_list:
-                insert = self.preprocessing(item)
-                if insert:
-                    insert_list.append(insert)
-            
-            return insert_list, len(insert_list), True
-        except Exception as e:
-            self.logger.error(f"Error in API pipeline: {str(e)}")
+    def fetch_pages(self, query: Query) -> List[bytes]:
+        # The first page's totalCount decides the rest: either the remaining pages at the same numOfRows (offsets
+        # must line up with page 1), or, when that would take more calls, every page again at a larger size balanced
+        # across ceil(totalCount / PAGE_ROWS_MAX) pages. Either way the pages are fetched in parallel.
+        first = self.fetch(query)
+        total_count = read_total_count(first)
+        self.expected_rows[query.region_code] = max(self.expected_rows.get(query.region_code, 0), total_count)
+        if total_count <= query.num_of_rows:
+            return [first]
+        
+        remaining = math.ceil(total_count / query.num_of_rows) - 1
+        page_cnt = math.ceil(total_count / self.config.PAGE_ROWS_MAX)
+        if page_cnt < remaining:
+            num_of_rows = min(math.ceil(total_count / page_cnt / 100) * 100, self.config.PAGE_ROWS_MAX)
+            pages = [replace(query, num_of_rows=num_of_rows, page_no=page_no) for page_no in range(1, math.ceil(total_count / num_of_rows) + 1)]
+            return list(self.page_executor.map(self.fetch, pages))
+        pages = [replace(query, page_no=page_no) for page_no in range(2, remaining + 2)]
+        return [first] + list(self.page_executor.map(self.fetch, pages))
+
+    def source_columns(self) -> List[str]:
+        return SOURCE_COLUMNS if self.compact is not None else TRADE_COLUMNS
+
+    def process_response(self, contents: List[bytes], query: Optional[Query] = None):
+        return self.handle_batch(parse_content(contents, self.preprocessor, self.source_columns()), contents, query)
+
+    def handle_batch(self, batch: ParsedBatch, contents: List[bytes], query: Optional[Query] = None):
+        metrics.observe('parse_seconds', batch.elapsed - batch.preprocess_elapsed)
+        if batch.preprocess_elapsed:
+            metrics.observe('preprocess_seconds', batch.preprocess_elapsed)
+        
+        if batch.result_code not in SUCCESS_CODES | NODATA_CODES:
+            self.logger.warning(f"API request failed. Result code: {batch.result_code}, Message: {batch.result_msg}")
             return [], 0, False
+        
+        if batch.total_count != batch.item_cnt:
+            # Deals registered between page requests shift the pages; the task fails and is retried rather than
+            # being recorded as empty.
+            self.logger.warning(f"Incomplete response: {batch.item_cnt} of {batch.total_count} items in {len(contents)} pages")
+            return [], 0, False
+        
+        if query is not None and self.response_store is not None:
+            # The raw copy only serves replay; failing to keep it must not fail a fetched and validated task.
+            try:
+                self.response_store.put_pages(query.region_code, query.deal_ymd, contents)
+            except Exception as e:
+                metrics.inc('raw_store_errors')
+                self.logger.error(f"Error storing raw responses ({query.region_code}, {query.deal_ymd}) : {str(e)}.")
+        
+        if not batch.item_cnt:
+            self.logger.info(f"No data returned from API. Result code: {batch.result_code}, Message: {batch.result_msg}, Total count: {batch.total_count}")
+            return [], 0, True
+        
+        self.log_dropped(batch.dropped)
+        insert_list = batch.rows
+        if self.compact is not None:
+            # Dimension lookups hit the database, so they run on the writer side rather than in the parse workers.
+            insert_list = self.compact.transform(pd.DataFrame(insert_list, columns=SOURCE_COLUMNS))
+        
+        return insert_list, len(insert_list), True
 
-    def preprocessing(self, item: BeautifulSoup) -> List[Any]:
-        def safe_find(item, tag):
-            found = item.find(tag)
-            return found.string.strip() if found and found.string else None
+    def log_dropped(self, dropped: Dict[str, int]):
+        # Most responses drop a few items, so counts are summed and logged once per WARN_INTERVAL.
+        if dropped.get('missing'):
+            self.dropped_log.add(logging.WARNING, "Missing essential data", dropped['missing'])
+        if dropped.get('invalid'):
+            self.dropped_log.add(logging.ERROR, "ValueError in preprocessing", dropped['invalid'])
+        if dropped.get('unknown_district'):
+            self.dropped_log.add(logging.WARNING, "No matching district info", dropped['unknown_district'])
 
-        try:
-            year = safe_find(item, 'dealYear')
-            month = safe_find(item, 'dealMonth')
-            day = safe_find(item, 'dealDay')
-            price = safe_find(item, 'dealAmount')
-            area = safe_find(item, 'excluUseAr')
-            code = safe_find(item, 'sggCd')
-            dong_name = safe_find(item, 'umdNm')
-            jibun = safe_find(item, 'jibun')
-            con_year = safe_find(item, 'buildYear')
-            apt_name = safe_find(item, 'aptNm')
-            floor = safe_find(item, 'floor')
-            apt_dong = safe_find(item, 'aptDong')
-
-            if not all([year, month, day, price, area, code, dong_name, jibun, con_year, apt_name, floor]):
-                self.logger.warning(f"Missing essential data: {item}")
-                return None
-
-            year = int(year)
-            month = int(month)
-            day = int(day)
-            price = int(price.replace(',', ''))
-            area = round(float(area), 0)
-            con_year = int(con_year)
-            floor = abs(int(floor))
-            apt_name = re.sub(r'\(.*?\)', '', apt_name)
-
-            district_info = self.district_code[self.district_code['region_code'] == code]
-            if district_info.empty:
-                self.logger.warning(f"No matching district info for code: {code}")
-                return None
-
-            district_info = district_info.iloc[0]
-            sigungu = district_info['addr_1']
-            addr_1 = district_info['addr_1']
-            addr_2 = district_info['addr_2']
-
-            region_code = code
-            contract_dte = dt.datetime(year, month, day).strftime('%Y-%m-%d')
-            district = sigungu
-            cd_district = addr_1
-            address = f"{addr_2} {dong_name} {jibun} {apt_name}"
-            price_unit = float(price) / 10000
-            py = round((float(price) / area) * 3.3, 0)
-            py_unit = py / 10000
-
-            schemas = [
-                region_code, contract_dte, district, cd_district, con_year, address,
-                apt_name, apt_dong, floor, area, price, price_unit, py, py_unit
-            ]
-
-            return schemas
-        except ValueError as e:
-            self.logger.error(f"ValueError in preprocessing: {str(e)}")
-            return None
-        except Exception as e:
-            self.logger.error(f"Unexpected error in preprocessing: {str(e)}")
-            return None
+    def run_pipeline(self, queries, write_tbl, query_length, on_result=None) -> int:
+        # fetch threads -> parse_queue -> parse process pool -> write_queue -> writer threads. Both queues are bounded,
+        # so a slow writer stalls parsing and a slow parser stalls fetching instead of piling responses up in memory.
+        # PARSE_WORKERS = 0 parses on the dispatcher thread instead of a process pool. on_result(query, result)
+        # replaces the write-behind buffer and ledger bookkeeping, as the delta sync does.
+        parse_queue, write_queue = Queue(self.config.QUEUE_SIZE), Queue(self.config.QUEUE_SIZE)
+        stages = {
+            'fetch': StageStats('fetch', self.config.CONCURRENCY),
+            'parse': StageStats('parse', max(self.config.PARSE_WORKERS, 1)),
+            'write': StageStats('write', self.config.WRITE_WORKERS)
+        }
+        monitor = PipelineMonitor(list(stages.values()), {'parse_queue': parse_queue, 'write_queue': write_queue}, self.logger, self.config.REPORT_INTERVAL)
+        stop = threading.Event()
+        errors = []
+        lock = threading.Lock()
+        counter = itertools.count(1)
+        observe_data_cnt = 0
+
+        def guard(target):
+            # A failing stage stops the others instead of leaving them blocked on a queue nobody drains.
+            def run():
+                try:
+                    target()
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+                    self.logger.error(f"Pipeline stage {threading.current_thread().name} failed : {str(e)}.")
+            return run
+
+        def fetch_stage():
+            while not stop.is_set():
+                with lock:
+                    query = next(queries, None)
+                if query is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    contents = self.fetch_pages(query)
+                except Exception as e:
+                    contents = None
+                    self.logger.error(f"Error in API pipeline: {str(e)}")
+                stages['fetch'].record(time.perf_counter() - start)
+                if not put_until(parse_queue, (query, contents), stop):
+                    return
+
+        def parse_stage():
+            columns = self.source_columns()
+            executor = None
+            if self.config.PARSE_WORKERS:
+                # Forking here would copy fetch/write threads' held locks (logging, pool, sqlite) into the children;
+                # forkserver starts them from a clean single-threaded server instead (spawn where it is missing).
+                start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                executor = ProcessPoolExecutor(self.config.PARSE_WORKERS, mp_context=multiprocessing.get_context(start_method),
+                                               initializer=init_parse_worker, initargs=(self.district_code,))
+            inflight = {}
+
+            def submit(contents):
+                if executor is not None:
+                    return executor.submit(parse_in_worker, contents, columns)
+                future = Future()
+                try:
+                    future.set_result(parse_content(contents, self.preprocessor, columns))
+                except Exception as e:
+                    future.set_exception(e)
+                return future
+
+            def collect(futures):
+                for future in futures:
+                    query, contents = inflight.pop(future)
+                    try:
+                        batch = future.result()
+                        stages['parse'].record(batch.elapsed)
+                    except Exception as e:
+                        batch = None
+                        self.logger.error(f"Error parsing response ({query.region_code}, {query.deal_ymd}) : {str(e)}.")
+                    put_until(write_queue, (query, contents, batch), stop)
+
+            try:
+                for query, contents in iter_queue(parse_queue, stop):
+                    if contents is None:
+                        put_until(write_queue, (query, None, None), stop)
+                        continue
+                    inflight[submit(contents)] = (query, contents)
+                    if len(inflight) >= max(self.config.PARSE_WORKERS, 1) * 2:
+                        done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                collect(list(inflight))
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+                for _ in range(self.config.WRITE_WORKERS):
+                    put_until(write_queue, STOP, stop)
+
+        def write_stage():
+            nonlocal observe_data_cnt
+            # Each writer has its own buffer and pending task list, so a task is only completed by the writer
+            # whose flush committed its rows.
+            completed = []
+            with self.create_writer(write_tbl, on_flush=lambda: self.commit_completed(completed)) if on_result is None else nullcontext() as writer:
+                for query, contents, batch in iter_queue(write_queue, stop):
+                    start = time.perf_counter()
+                    try:
+                        result = self.handle_batch(batch, contents, query) if batch is not None else ([], 0, False)
+                    except Exception as e:
+                        result = ([], 0, False)
+                        self.logger.error(f"Error handling response ({query.region_code}, {query.deal_ymd}) : {str(e)}.")
+                    if on_result is None:
+                        self.write_result(writer, completed, query, result, next(counter), query_length)
+                    else:
+                        on_result(query, result)
+                    if result[2]:
+                        with lock:
+                            observe_data_cnt += result[1]
+                    stages['write'].record(time.perf_counter() - start)
+
+        threads = {
+            name: [threading.Thread(target=guard(target), name=f"crawler-{name}-{idx}", daemon=True) for idx in range(workers)]
+            for name, target, workers in (('fetch', fetch_stage, self.config.CONCURRENCY), ('parse', parse_stage, 1), ('write', write_stage, self.config.WRITE_WORKERS))
+        }
+        monitor.start()
+        for thread in itertools.chain.from_iterable(threads.values()):
+            thread.start()
+        for thread in threads['fetch']:
+            thread.join()
+        put_until(parse_queue, STOP, stop)
+        for thread in threads['parse'] + threads['write']:
+            thread.join()
+        monitor.stop()
+        
+        if errors:
+            raise errors[0]
+        return observe_data_cnt
 
     def insert_to_db(self, tbl):
-        query_list = self.set_query_list()
-        observe_data_cnt = 0
+        query_length = self.set_query_list()
+        write_tbl = self.write_table(tbl)
         
-        for idx, query in enumerate(query_list):
-            query_length = len(query_list)
-            query_index = idx + 1
-            
+        # For large backfills, secondary indexes from the table config are dropped and rebuilt once after the load.
+        if self.config.DEFER_INDEXES:
+            self.dbm.drop_indexes(write_tbl)
+        
+        try:
+            with self.metrics_exporter():
+                observe_data_cnt = self.run_pipeline(self.iter_queries(), write_tbl, query_length)
+                observe_data_cnt += self.verify_deferred(write_tbl)
+        finally:
+            if self.config.DEFER_INDEXES:
+                self.dbm.create_indexes(write_tbl)
+        
+        self.dropped_log.flush()
+        counts = self.task_ledger.counts(self.date_list[0], self.date_list[-1])
+        self.logger.info(f"Total queries processed: {query_length}, Total data inserted: {observe_data_cnt}, Task states: {counts}")
+        self.report_emptiness(counts)
+        self.refresh_summary(tbl)
+
+    def metrics_exporter(self):
+        # Exports every METRICS_INTERVAL seconds and once more on exit; METRICS_PATH = None turns exporting off.
+        if not self.config.METRICS_PATH:
+            return nullcontext()
+        path = self.config.METRICS_PATH.format(worker_id=self.worker_id)
+        return MetricsExporter(path, self.config.METRICS_FORMAT, self.config.METRICS_INTERVAL, logger=self.logger)
+
+    def sync(self, tbl, months: Optional[int] = None) -> Dict[str, int]:
+        # Re-crawls the trailing `months` months (SYNC_MONTHS by default) and rewrites only the (district, month)
+        # slices whose fingerprint differs from the stored one, each in its own transaction. Late filings and
+        # cancellations are picked up without rerunning the full START_YEAR-END_YEAR range.
+        date_list = trailing_months(months or self.config.SYNC_MONTHS)
+        region_codes = self.district_code['region_code'].astype(str).tolist()
+        write_tbl = self.write_table(tbl)
+        key_cols = self.dbm.tbl_config.get(write_tbl, {}).get('natural_key', TRADE_NATURAL_KEY)
+        upsert_cols = self.natural_key(write_tbl)
+        # Named after tbl rather than the fact table, so readers of tbl (stats, snapshots) find its sync generations.
+        delta = DeltaSync(self.dbm, write_tbl, key_cols, sync_tbl=f"{tbl}_sync")
+        stored = delta.stored(region_codes, date_list)
+        self.expected_rows.update(self.task_ledger.max_item_counts())
+        self.task_ledger.seed(region_codes, date_list)
+        
+        counts = {'unchanged': 0, 'changed': 0, 'failed': 0, 'rows_written': 0}
+        unchanged, completed = [], []
+        lock = threading.Lock()
+        
+        def fail(query, reason):
+            with lock:
+                counts['failed'] += 1
+            self.logger.warning(f"Sync of ({query.region_code}, {query.deal_ymd}) failed ({reason}); the stored slice is kept.")
+        
+        def apply(query, result):
+            insert_list, insert_data_cnt, is_success = result
+            if not is_success:
+                fail(query, 'API request failure')
+                return
+            if upsert_cols:
+                insert_list = delta.dedupe(insert_list)
+            fingerprint = delta.row_fingerprint(insert_list)
+            if stored.get((query.region_code, query.deal_ymd)) == fingerprint:
+                with lock:
+                    counts['unchanged'] += 1
+                    unchanged.append((query.region_code, query.deal_ymd, fingerprint, insert_data_cnt))
+                    completed.append((query.region_code, query.deal_ymd, insert_data_cnt))
+                return
             try:
-                insert_list, insert_data_cnt, is_success = self.api_pipeline(query=query)
-                if is_success:
-                    if insert_list:
-                        self.dbm.insert_data(tbl_name=tbl, data_list=insert_list)
-                        observe_data_cnt += insert_data_cnt
-                        self.logger.info(f"Processing : [{query_index} / {query_length}] \t Inserted : [{insert_data_cnt}] \t Observed : [{observe_data_cnt}]")
-                    else:
-                        self.logger.info(f"Processing : [{query_index} / {query_length}] \t No data to insert")
-                    
-                    self.progress_manager.progress['last_date'] += 1
-                    self.progress_manager.save_progress()
-                else:
-                    self.logger.warning(f"Skipping query {query_index} due to API request failure")
-                
+                deleted, inserted = delta.replace(query.region_code, query.deal_ymd, insert_list, fingerprint, key_cols=upsert_cols)
             except Exception as e:
-                if isinstance(e, AttributeError):
-                    self.logger.error(f"AttributeError : {str(e)}.")
-                elif isinstance(e, ValueError):
-                    self.logger.error(f"ValueError : {str(e)}.")
+                fail(query, str(e))
+                return
+            with lock:
+                counts['changed'] += 1
+                counts['rows_written'] += inserted
+                completed.append((query.region_code, query.deal_ymd, insert_data_cnt))
+                self.touched_months.add(query.deal_ymd)
+            self.logger.info(f"Sync ({query.region_code}, {query.deal_ymd}): replaced {deleted} rows with {inserted}.")
+        
+        queries = iter([Query(region_code, deal_ymd, num_of_rows=self.page_size(region_code)) for deal_ymd in date_list for region_code in region_codes])
+        with self.metrics_exporter():
+            self.run_pipeline(queries, write_tbl, len(region_codes) * len(date_list), on_result=apply)
+        delta.record(unchanged)
+        self.task_ledger.complete(completed)
+        for result in ('unchanged', 'changed', 'failed'):
+            metrics.inc('sync_partitions', counts[result], {'result': result})
+        metrics.inc('sync_rows_written', counts['rows_written'])
+        
+        self.dropped_log.flush()
+        self.logger.info(f"Sync of {date_list[0]}-{date_list[-1]} ({len(region_codes) * len(date_list)} slices): {counts}")
+        self.refresh_summary(tbl)
+        return counts
+
+    def refresh_summary(self, tbl):
+        # Only months that received rows in this run are recomputed.
+        if not self.config.REFRESH_SUMMARY or not self.touched_months:
+            return
+        try:
+            PriceSummary(self.dbm, tbl).refresh(self.touched_months)
+            self.touched_months = set()
+        except Exception as e:
+            self.logger.error(f"Error refreshing summary of {tbl} : {str(e)}.")
+
+    def write_table(self, tbl) -> str:
+        # With COMPACT_LAYOUT, tbl becomes a view over <tbl>_fact and the apt_complex dimension. Keyed writes need a
+        # complete row_key, so a table loaded before UPSERT is migrated here, before any pipeline starts; the ingest
+        # stamp that stats refreshes read is added the same way.
+        write_tbl = tbl
+        if self.config.COMPACT_LAYOUT:
+            if self.compact is None or self.compact.view_name != tbl:
+                self.compact = CompactTrade(self.dbm, tbl)
+            write_tbl = self.compact.fact_tbl
+        self.dbm.migrate_ingest_col(write_tbl)
+        key_cols = self.natural_key(write_tbl)
+        if key_cols:
+            self.dbm.migrate_row_key(write_tbl, key_cols)
+        return write_tbl
+
+    def natural_key(self, tbl) -> Optional[List[str]]:
+        if not self.config.UPSERT:
+            return None
+        return self.dbm.tbl_config.get(tbl, {}).get('natural_key', TRADE_NATURAL_KEY)
+
+    def create_writer(self, write_tbl, on_flush=None) -> WriteBehindBuffer:
+        # Tasks are marked done/empty in the ledger only after the buffer has committed their rows.
+        return WriteBehindBuffer(
+            self.dbm, write_tbl, flush_rows=self.config.FLUSH_ROWS, flush_interval=self.config.FLUSH_INTERVAL,
+            method=self.config.BULK_METHOD, on_flush=on_flush, key_cols=self.natural_key(write_tbl)
+        )
+
+    def commit_completed(self, completed):
+        if completed:
+            self.task_ledger.complete(completed)
+            completed.clear()
+
+    def write_result(self, writer, completed, query, result, query_index, query_length):
+        try:
+            insert_list, insert_data_cnt, is_success = result
+            if is_success:
+                completed.append((query.region_code, query.deal_ymd, insert_data_cnt))
+                writer.add(insert_list)
+                if insert_list:
+                    self.touched_months.add(query.deal_ymd)
+                    self.logger.info(f"Processing : [{query_index} / {query_length}] \t Buffered : [{insert_data_cnt}]")
                 else:
-                    self.logger.error(f"Error inserting data to database : {str(e)}.")
+                    self.logger.info(f"Processing : [{query_index} / {query_length}] \t No data to insert")
+            else:
+                self.task_ledger.fail(query.region_code, query.deal_ymd, 'API request failure')
+                self.logger.warning(f"Skipping query {query_index} ({query.region_code}, {query.deal_ymd}) due to API request failure")
             
-            finally:
-                time.sleep(0.1)
+        except Exception as e:
+            if isinstance(e, AttributeError):
+                self.logger.error(f"AttributeError : {str(e)}.")
+            elif isinstance(e, ValueError):
+                self.logger.error(f"ValueError : {str(e)}.")
+            else:
+                self.logger.error(f"Error inserting data to database : {str(e)}.")
+
+    def replay(self, tbl, region_codes: Optional[List[str]] = None):
+        # Rebuilds tbl from the raw response store only: no API calls and no progress/quota bookkeeping.
+        if self.response_store is None:
+            raise ValueError("Replay requires STORE_RAW to be enabled.")
         
-        self.logger.info(f"Total queries processed: {query_length}, Total data inserted: {observe_data_cnt}")
+        response_cnt = 0
+        observe_data_cnt = 0
+        write_tbl = self.write_table(tbl)
+        writer = self.create_writer(write_tbl)
+        responses = self.response_store.iter_responses(region_codes, start_ymd=f"{self.config.START_YEAR}01", end_ymd=f"{self.config.END_YEAR}12")
+        
+        with self.metrics_exporter(), writer:
+            for (lawd_cd, deal_ymd), pages in itertools.groupby(responses, key=lambda response: response[:2]):
+                contents = [content for _, _, _, content in pages]
+                response_cnt += len(contents)
+                try:
+                    insert_list, insert_data_cnt, is_success = self.process_response(contents)
+                    if is_success:
+                        writer.add(insert_list)
+                        observe_data_cnt += insert_data_cnt
+                        if insert_list:
+                            self.touched_months.add(deal_ymd)
+                except Exception as e:
+                    self.logger.error(f"Error replaying response ({lawd_cd}, {deal_ymd}) : {str(e)}.")
+        
+        self.dropped_log.flush()
+        self.logger.info(f"Total responses replayed: {response_cnt}, Total data inserted: {observe_data_cnt}")
+        self.refresh_summary(tbl)
+
+def run_worker(config: Config, tbl: str):
+    # multiprocessing children skip atexit, so the log queues are drained here.
+    try:
+        Crawler(config).insert_to_db(tbl)
+    finally:
+        Logger().shutdown()
+
+def run_workers(config: Config, tbl: str, n_workers: int):
+    # Local worker processes share the task and quota ledgers; worker ids are stable per slot so a restarted
+    # slot recovers its own in-flight tasks immediately. Workers on other hosts run the same loop with
+    # LEDGER_BACKEND/QUOTA_BACKEND set to 'mysql'.
+    processes = []
+    for idx in range(n_workers):
+        worker_config = replace(config, WORKER_ID=f"{config.WORKER_ID or socket.gethostname()}-w{idx}")
+        process = multiprocessing.Process(target=run_worker, args=(worker_config, tbl), name=worker_config.WORKER_ID)
+        process.start()
+        processes.append(process)
+    for process in processes:
+        process.join()
 
 if __name__ == '__main__':
-    config = Config(DB_NAME='atamDB', IMPORT_TBL_NAME='district_code', START_YEAR=2017, END_YEAR=2023)
-    pipeline = Crawler(config)
-    pipeline.insert_to_db('trade')
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replay', action='store_true')
+    parser.add_argument('--sync', action='store_true', help='re-crawl the trailing SYNC_MONTHS months and rewrite changed slices')
+    parser.add_argument('--months', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite')
+    args = parser.parse_args()
+    
+    config = Config(DB_NAME='atamDB', IMPORT_TBL_NAME='district_code', START_YEAR=2017, END_YEAR=2023, LEDGER_BACKEND=args.backend, QUOTA_BACKEND=args.backend)
+    if args.replay:
+        Crawler(config).replay('trade')
+    elif args.sync:
+        Crawler(config).sync('trade', args.months)
+    elif args.workers > 1:
+        run_workers(config, 'trade', args.workers)
+    else:
+        Crawler(config).insert_to_db('trade')
\ No newline at end of file
@@ -1,11 +1,15 @@
 import os
 import sys
-import json
+import time
 import pymysql
+import tempfile
+import threading
+import datetime as dt
 
 import pandas as pd
 
 from functools import wraps
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 
 import pymysql.cursors
@@ -14,17 +18,19 @@ ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 sys.path.append(ROOT_DIR)
 
 from modules.util.logger import Logger
+from modules.util.utils import natural_key_hash, load_config
+from modules.util.metrics import metrics
+
+ROW_KEY_COL = 'row_key'
+INGEST_COL = 'ingested_at'
 
 class DBM:
-    def __init__(self, db_name):
+    def __init__(self, db_name, pool_size=None, pool_recycle=None):
         self.db = db_name
         self.logger = Logger().get_logger(module_name='modules.data.dbm')
         
-        with open('./config/db/connection_configs.json', 'r') as config:
-            self.connection_config = json.load(config)
-            
-        with open('./config/db/table_configs.json', 'r', encoding='utf8') as config:
-            self.tbl_config = json.load(config)
+        self.connection_config = load_config('./config/db/connection_configs.json')
+        self.tbl_config = load_config('./config/db/table_configs.json')
         
         self.connection_params = {
             'host': self.connection_config['host'],
@@ -34,7 +40,83 @@ class DBM:
             'database': self.db
         }
         
-        self.engine = create_engine(f"mysql+pymysql://{self.connection_params['user']}:{self.connection_params['password']}@{self.connection_params['host']}:{self.connection_params['port']}/{self.connection_params['database']}")
+        # One pool per DBM: db_operation checks raw connections out of the engine's QueuePool, so pandas/SQLAlchemy
+        # reads and cursor-based writes share the same size limit, pre-ping health check and recycling.
+        self.pool_config = {
+            'pool_size': int(pool_size or self.connection_config.get('pool_size', 5)),
+            'max_overflow': int(self.connection_config.get('max_overflow', 5)),
+            'pool_timeout': int(self.connection_config.get('pool_timeout', 30)),
+            'pool_recycle': int(pool_recycle or self.connection_config.get('pool_recycle', 3600)),
+            'pool_pre_ping': True
+        }
+        self.local_infile = bool(self.connection_config.get('local_infile', False))
+        self.engine = create_engine(f"mysql+pymysql://{self.connection_params['user']}:{self.connection_params['password']}@{self.connection_params['host']}:{self.connection_params['port']}/{self.connection_params['database']}", connect_args={'local_infile': self.local_infile}, **self.pool_config)
+        self.local = threading.local()
+        self.db_lock = threading.Lock()
+        self.db_ready = False
+        self.keyed_tables = set()
+        self.stamped_tables = set()
+        
+    @property
+    def conn(self):
+        return getattr(self.local, 'conn', None)
+    
+    @conn.setter
+    def conn(self, conn):
+        self.local.conn = conn
+        
+    @property
+    def cursor(self):
+        return getattr(self.local, 'cursor', None)
+    
+    @cursor.setter
+    def cursor(self, cursor):
+        self.local.cursor = cursor
+        
+    def create_database(self):
+        with self.db_lock:
+            if self.db_ready:
+                return
+            server_params = {key: value for key, value in self.connection_params.items() if key != 'database'}
+            conn = pymysql.connect(**server_params)
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SHOW DATABASES LIKE %s", (self.db,))
+                    if not cursor.fetchone():
+                        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.db}")
+                        conn.commit()
+                        self.logger.info(f"Create database {self.db}.")
+            finally:
+                conn.close()
+            self.db_ready = True
+            
+    def drop_database(self):
+        # Only meant for disposable databases such as the benchmark target; pooled connections are closed first.
+        self.engine.dispose()
+        server_params = {key: value for key, value in self.connection_params.items() if key != 'database'}
+        conn = pymysql.connect(**server_params)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP DATABASE IF EXISTS {self.db}")
+                conn.commit()
+                self.logger.info(f"Drop database {self.db}.")
+        finally:
+            conn.close()
+        with self.db_lock:
+            self.db_ready = False
+            
+    @contextmanager
+    def connection(self):
+        # Acquisition time grows when pool_size is too small for the concurrent readers and writers.
+        with metrics.timer('db_connection_acquire_seconds', {'db': self.db}):
+            conn = self.engine.raw_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+            
+    def dispose(self):
+        self.engine.dispose()
         
     def db_operation(create_db=False):
         def decorator(func):
@@ -42,30 +124,20 @@ class DBM:
             def wrapper(self, *args, **kwargs):
                 try:
                     if create_db:
-                        conn = pymysql.connect(**self.connection_params)
-                        with conn.cursor() as cursor:
-                            cursor.execute(f"SHOW DATABASES LIKE %s", (self.db,))
-                            if not cursor.fetchone():
-                                cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.db}")
-                                conn.commit()
-                                self.logger.info(f"Create database {self.db}.")
-                        conn.close()
-                    
-                    self.conn = pymysql.connect(**self.connection_params, db=self.db)
-                    self.cursor = self.conn.cursor()
-                    
-                    # self.logger.info(f"Connect to database {self.db}.")
+                        self.create_database()
                     
-                    result = func(self, *args, **kwargs)
-                    return result
+                    with self.connection() as conn:
+                        self.conn = conn
+                        self.cursor = conn.cursor()
+                        try:
+                            return func(self, *args, **kwargs)
+                        finally:
+                            self.cursor.close()
+                            self.cursor = None
+                            self.conn = None
                 except Exception as e:
                     self.logger.error(f"Error connecting to database {self.db} : {str(e)}.")
                     raise
-                finally:
-                    if hasattr(self, 'cursor') and self.cursor:
-                        self.cursor.close()
-                    if hasattr(self, 'conn') and self.conn.open:
-                        self.conn.close()
             return wrapper
         return decorator
     
@@ -74,8 +146,9 @@ class DBM:
         self.cursor.execute(f"SHOW TABLES LIKE %s", (tbl_name,))
         if not self.cursor.fetchone():
             cols_schemas = ', '.join([f"{col} {value}" for col, value in self.tbl_config[tbl_name]['schemas'].items()])
+            index_defs = ''.join(f", {clause}" for clause in self.index_clauses(tbl_name, 'create'))
             if query is None:
-                query = f"CREATE TABLE {tbl_name} ({cols_schemas})"
+                query = f"CREATE TABLE {tbl_name} ({cols_schemas}{index_defs}){self.partition_clause(tbl_name)}"
             else:
                 query = query
             try:
@@ -87,6 +160,100 @@ class DBM:
         else:
             self.logger.info(f"Table({tbl_name}) is already exists.")
             
+    def is_partitioned(self, tbl_name):
+        return bool(self.tbl_config.get(tbl_name, {}).get('partition'))
+            
+    def partition_clause(self, tbl_name):
+        # "partition": {"column": "contract_dte", "start_year": 2006, "end_year": 2025} -> one RANGE partition per
+        # year plus pmax. MySQL then requires every unique key to include the column and allows no foreign keys.
+        partition = self.tbl_config.get(tbl_name, {}).get('partition')
+        if not partition:
+            return ''
+        col = partition['column']
+        end_year = int(partition.get('end_year', dt.date.today().year))
+        parts = ', '.join(f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in range(int(partition['start_year']), end_year + 1))
+        return f" PARTITION BY RANGE (YEAR({col})) ({parts}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    
+    def index_clauses(self, tbl_name, action, indexes=None, existing=()):
+        # "indexes": {"idx_trade_region_dte": ["region_code", "contract_dte"]} or {"name": {"columns": [...], "unique": true}}
+        if indexes is None:
+            indexes = self.tbl_config.get(tbl_name, {}).get('indexes', {})
+        clauses = []
+        for name, spec in indexes.items():
+            cols = spec if isinstance(spec, list) else spec['columns']
+            unique = 'UNIQUE ' if isinstance(spec, dict) and spec.get('unique') else ''
+            if action == 'create':
+                clauses.append(f"{unique}INDEX {name} ({', '.join(cols)})")
+            elif action == 'add' and name not in existing:
+                clauses.append(f"ADD {unique}INDEX {name} ({', '.join(cols)})")
+            elif action == 'drop' and name in existing:
+                clauses.append(f"DROP INDEX {name}")
+        return clauses
+    
+    def get_index_names(self, tbl_name):
+        self.cursor.execute(f"SHOW INDEX FROM {tbl_name}")
+        return {row[2] for row in self.cursor.fetchall()}
+    
+    @db_operation(create_db=False)
+    def create_indexes(self, tbl_name, indexes=None):
+        # All missing secondary indexes are built in one ALTER TABLE, i.e. one sorted build per index after a load
+        # instead of per-row maintenance during ingest.
+        clauses = self.index_clauses(tbl_name, 'add', indexes, self.get_index_names(tbl_name))
+        if not clauses:
+            return
+        start = time.perf_counter()
+        try:
+            self.cursor.execute(f"ALTER TABLE {tbl_name} {', '.join(clauses)}")
+            self.logger.info(f"Create {len(clauses)} indexes on {tbl_name} ({time.perf_counter() - start:.1f}s).")
+        except Exception as e:
+            self.logger.error(f"Error creating indexes on {tbl_name} : {str(e)}.")
+            
+    @db_operation(create_db=False)
+    def drop_indexes(self, tbl_name, indexes=None):
+        clauses = self.index_clauses(tbl_name, 'drop', indexes, self.get_index_names(tbl_name))
+        if not clauses:
+            return
+        try:
+            self.cursor.execute(f"ALTER TABLE {tbl_name} {', '.join(clauses)}")
+            self.logger.info(f"Drop {len(clauses)} indexes on {tbl_name}.")
+        except Exception as e:
+            self.logger.error(f"Error dropping indexes on {tbl_name} : {str(e)}.")
+            
+    @db_operation(create_db=False)
+    def add_partitions(self, tbl_name, end_year):
+        # Splits pmax so years up to end_year get their own partition; rows already in pmax are moved accordingly.
+        partition = self.tbl_config[tbl_name]['partition']
+        self.cursor.execute(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            (self.db, tbl_name)
+        )
+        existing = {row[0] for row in self.cursor.fetchall()}
+        years = [year for year in range(int(partition['start_year']), end_year + 1) if f"p{year}" not in existing]
+        if not years:
+            return
+        parts = ', '.join(f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in years)
+        try:
+            self.cursor.execute(f"ALTER TABLE {tbl_name} REORGANIZE PARTITION pmax INTO ({parts}, PARTITION pmax VALUES LESS THAN MAXVALUE)")
+            self.logger.info(f"Add partitions p{years[0]}..p{years[-1]} to {tbl_name}.")
+        except Exception as e:
+            self.logger.error(f"Error adding partitions to {tbl_name} : {str(e)}.")
+            
+    @db_operation(create_db=False)
+    def profile_query(self, query, params=None, repeat=5):
+        self.cursor.execute(f"EXPLAIN {query}", params)
+        cols = [desc[0] for desc in self.cursor.description]
+        plan = [dict(zip(cols, row)) for row in self.cursor.fetchall()]
+        
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.cursor.execute(query, params)
+            row_cnt = len(self.cursor.fetchall())
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        
+        return {'query': query, 'params': params, 'plan': plan, 'rows': row_cnt, 'latency_ms': latencies[len(latencies) // 2]}
+            
     @db_operation(create_db=False)
     def set_pk(self, tbl_name, pk_col_name, const_name, query=None):
         if query is None:
@@ -123,21 +290,311 @@ class DBM:
         else:
             query = query
         try:
+            start = time.perf_counter()
             self.cursor.executemany(query, data_list)
             self.conn.commit()
+            elapsed = time.perf_counter() - start
+            metrics.observe('db_insert_seconds', elapsed, {'table': tbl_name, 'method': 'executemany'})
+            metrics.inc('db_rows_inserted', len(data_list), {'table': tbl_name})
+            self.logger.debug(f"Insert {len(data_list)} rows to {tbl_name} ({len(data_list) / max(elapsed, 1e-9):.0f} rows/sec).")
         except Exception as e:
             self.logger.error(f"Error inserting data to {tbl_name} : {str(e)}.")
             
     @db_operation(create_db=False)
-    def import_data(self, tbl_name, call_cols, limit=1000000, dates=None, query=None):
-        if call_cols:
-            call_cols = ", ".join(call_cols)
+    def bulk_insert(self, tbl_name, data_list, method='values', commit_rows=50000, key_cols=None):
+        # 'values' sends multi-row INSERT ... VALUES statements (pymysql's executemany rewrites INSERTs into
+        # max_allowed_packet-sized batches) and commits every commit_rows rows. 'infile' streams the rows through
+        # LOAD DATA LOCAL INFILE and needs local_infile enabled on both the server and connection_configs.json.
+        # With key_cols, each row gets a row_key hash of those columns and is upserted against its unique index,
+        # so loading the same deals again updates them in place instead of duplicating them.
+        cols_list = list(self.tbl_config[tbl_name]['list'])
+        if key_cols:
+            self.require_row_key(tbl_name)
+            data_list = self.add_row_keys(cols_list, data_list, key_cols)
+            cols_list.append(ROW_KEY_COL)
+        cols = ', '.join(cols_list)
+        start = time.perf_counter()
+        try:
+            if method == 'infile':
+                if not self.local_infile:
+                    raise ValueError("LOAD DATA LOCAL INFILE requires 'local_infile' in connection_configs.json")
+                for idx in range(0, len(data_list), commit_rows):
+                    if key_cols:
+                        self.merge_infile(tbl_name, cols_list, data_list[idx:idx + commit_rows])
+                    else:
+                        self.load_infile(tbl_name, cols, data_list[idx:idx + commit_rows])
+                    self.conn.commit()
+            elif method == 'values':
+                placeholders = ', '.join(['%s'] * len(cols_list))
+                query = f"INSERT INTO {tbl_name} ({cols}) VALUES ({placeholders})"
+                if key_cols:
+                    query += self.upsert_clause(cols_list)
+                for idx in range(0, len(data_list), commit_rows):
+                    self.cursor.executemany(query, data_list[idx:idx + commit_rows])
+                    self.conn.commit()
+            else:
+                raise ValueError(f"Unknown bulk insert method: {method}")
+        except Exception as e:
+            self.conn.rollback()
+            self.logger.error(f"Error bulk inserting data to {tbl_name} : {str(e)}.")
+            raise
+        
+        elapsed = time.perf_counter() - start
+        metrics.observe('db_insert_seconds', elapsed, {'table': tbl_name, 'method': method})
+        metrics.inc('db_rows_inserted', len(data_list), {'table': tbl_name})
+        self.logger.info(f"Bulk {'upsert' if key_cols else 'insert'} {len(data_list)} rows to {tbl_name} via {method} ({len(data_list) / max(elapsed, 1e-9):.0f} rows/sec).")
+        return len(data_list), elapsed
+    
+    @db_operation(create_db=False)
+    def replace_rows(self, tbl_name, where, params, data_list, key_cols=None, statements=()):
+        # DELETE ... WHERE `where`, INSERT data_list and any extra (query, params) statements commit together, so
+        # readers see either the old or the new slice and bookkeeping written alongside never disagrees with it.
+        cols_list = list(self.tbl_config[tbl_name]['list'])
+        if key_cols:
+            self.require_row_key(tbl_name)
+            data_list = self.add_row_keys(cols_list, data_list, key_cols)
+            cols_list.append(ROW_KEY_COL)
+        start = time.perf_counter()
+        try:
+            self.cursor.execute(f"DELETE FROM {tbl_name} WHERE {where}", params)
+            deleted = self.cursor.rowcount
+            if data_list:
+                query = f"INSERT INTO {tbl_name} ({', '.join(cols_list)}) VALUES ({', '.join(['%s'] * len(cols_list))})"
+                if key_cols:
+                    query += self.upsert_clause(cols_list)
+                self.cursor.executemany(query, data_list)
+            for query, query_params in statements:
+                self.cursor.execute(query, query_params)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            self.logger.error(f"Error replacing rows of {tbl_name} : {str(e)}.")
+            raise
+
+        elapsed = time.perf_counter() - start
+        metrics.observe('db_insert_seconds', elapsed, {'table': tbl_name, 'method': 'replace'})
+        metrics.inc('db_rows_inserted', len(data_list), {'table': tbl_name})
+        self.logger.debug(f"Replace {deleted} rows of {tbl_name} with {len(data_list)} rows ({elapsed:.2f}s).")
+        return deleted, len(data_list)
+
+    def row_key_clause(self, tbl_name):
+        # On a partitioned table the unique index must also carry the partition column, which row_key already determines.
+        key_cols = ROW_KEY_COL
+        if self.is_partitioned(tbl_name):
+            key_cols += f", {self.tbl_config[tbl_name]['partition']['column']}"
+        return f"ADD COLUMN {ROW_KEY_COL} BINARY(16) NULL, ADD UNIQUE INDEX uq_{tbl_name}_{ROW_KEY_COL} ({key_cols})"
+
+    def require_row_key(self, tbl_name):
+        if tbl_name in self.keyed_tables:
+            return
+        self.cursor.execute(f"SHOW COLUMNS FROM {tbl_name} LIKE %s", (ROW_KEY_COL,))
+        if not self.cursor.fetchone():
+            raise ValueError(f"{tbl_name} has no {ROW_KEY_COL} column; run DBM.migrate_row_key first.")
+        self.keyed_tables.add(tbl_name)
+
+    def has_row_key(self, tbl_name):
+        # Complete means every row carries a key: a unique index admits any number of NULLs, so unkeyed rows would be
+        # duplicated by the next load of their month. The lookup runs on the row_key index.
+        self.cursor.execute(f"SHOW COLUMNS FROM {tbl_name} LIKE %s", (ROW_KEY_COL,))
+        if not self.cursor.fetchone():
+            return False
+        self.cursor.execute(f"SELECT 1 FROM {tbl_name} WHERE {ROW_KEY_COL} IS NULL LIMIT 1")
+        return self.cursor.fetchone() is None
+
+    @db_operation(create_db=False)
+    def migrate_row_key(self, tbl_name, key_cols, commit_rows=50000):
+        # Bootstrap for idempotent ingest, run before the first keyed write (the crawler does so when it starts). An
+        # empty table only gets the column and index; a loaded one is rebuilt by rebuild_with_row_key.
+        if tbl_name in self.keyed_tables:
+            return
+        with self.migration_lock(f"{ROW_KEY_COL}:{self.db}.{tbl_name}"):
+            if not self.has_row_key(tbl_name):
+                self.cursor.execute(f"SELECT 1 FROM {tbl_name} LIMIT 1")
+                if self.cursor.fetchone() is None:
+                    self.cursor.execute(f"ALTER TABLE {tbl_name} {self.row_key_clause(tbl_name)}")
+                    self.logger.info(f"Add {ROW_KEY_COL} unique index to {tbl_name}.")
+                else:
+                    self.rebuild_with_row_key(tbl_name, key_cols, commit_rows)
+            self.keyed_tables.add(tbl_name)
+
+    @db_operation(create_db=False)
+    def migrate_ingest_col(self, tbl_name):
+        # Stamps every row with the time it was last inserted or changed, which StatsEngine.refresh reads changed
+        # slices from. Rows already in the table get the time of the ALTER, so the first refresh after it rebuilds all.
+        if tbl_name in self.stamped_tables:
+            return
+        with self.migration_lock(f"{INGEST_COL}:{self.db}.{tbl_name}"):
+            self.cursor.execute(f"SHOW COLUMNS FROM {tbl_name} LIKE %s", (INGEST_COL,))
+            if not self.cursor.fetchone():
+                self.cursor.execute(
+                    f"ALTER TABLE {tbl_name} ADD COLUMN {INGEST_COL} TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6), "
+                    f"ADD INDEX idx_{tbl_name}_{INGEST_COL} ({INGEST_COL})"
+                )
+                self.logger.info(f"Add {INGEST_COL} column to {tbl_name}.")
+            self.stamped_tables.add(tbl_name)
+
+    @contextmanager
+    def migration_lock(self, name, timeout=3600):
+        # Workers starting together queue on a named lock and find the migration done once they get it.
+        lock_name = name[:64]
+        self.cursor.execute("SELECT GET_LOCK(%s, %s)", (lock_name, timeout))
+        if self.cursor.fetchone()[0] != 1:
+            raise TimeoutError(f"Timed out waiting for lock {lock_name}.")
+        try:
+            yield
+        finally:
+            self.cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+
+    def rebuild_with_row_key(self, tbl_name, key_cols, commit_rows):
+        # Rows are streamed into a keyed copy of the table, hashed in Python exactly as on ingest, so duplicates collapse
+        # on its unique index (the later row wins, as with the upsert). The copy replaces the table in one RENAME and
+        # the table's foreign keys are re-created on it. Writers other than crawler workers must be stopped meanwhile.
+        keyed_tbl, old_tbl = f"{tbl_name}_keyed", f"{tbl_name}_unkeyed"
+        start = time.perf_counter()
+        self.cursor.execute(f"SHOW COLUMNS FROM {tbl_name}")
+        # The ingest stamp is not copied: rows take the rebuild time, so stats re-read the slices duplicates left.
+        cols_list = [row[0] for row in self.cursor.fetchall() if row[0] not in (ROW_KEY_COL, INGEST_COL)]
+        foreign_keys = self.get_foreign_keys(tbl_name)
+        
+        self.cursor.execute(f"DROP TABLE IF EXISTS {keyed_tbl}")
+        self.cursor.execute(f"CREATE TABLE {keyed_tbl} LIKE {tbl_name}")
+        self.cursor.execute(f"SHOW COLUMNS FROM {keyed_tbl} LIKE %s", (ROW_KEY_COL,))
+        if not self.cursor.fetchone():
+            self.cursor.execute(f"ALTER TABLE {keyed_tbl} {self.row_key_clause(tbl_name)}")
+        
+        insert_cols = cols_list + [ROW_KEY_COL]
+        query = f"INSERT INTO {keyed_tbl} ({', '.join(insert_cols)}) VALUES ({', '.join(['%s'] * len(insert_cols))}){self.upsert_clause(insert_cols)}"
+        row_cnt = 0
+        for chunk in self.iter_data(tbl_name, query=f"SELECT {', '.join(cols_list)} FROM {tbl_name}", chunksize=commit_rows):
+            rows = chunk.astype(object).where(chunk.notna(), None).values.tolist()
+            self.cursor.executemany(query, self.add_row_keys(cols_list, rows, key_cols))
+            self.conn.commit()
+            row_cnt += len(rows)
+        self.cursor.execute(f"SELECT COUNT(*) FROM {keyed_tbl}")
+        kept_cnt = self.cursor.fetchone()[0]
+        
+        self.cursor.execute(f"RENAME TABLE {tbl_name} TO {old_tbl}, {keyed_tbl} TO {tbl_name}")
+        self.cursor.execute(f"DROP TABLE {old_tbl}")
+        for const_name, (fk_cols, ref_tbl, ref_cols) in foreign_keys.items():
+            self.cursor.execute(f"ALTER TABLE {tbl_name} ADD CONSTRAINT {const_name} FOREIGN KEY ({', '.join(fk_cols)}) REFERENCES {ref_tbl} ({', '.join(ref_cols)})")
+        self.logger.info(f"Rebuild {tbl_name} with {ROW_KEY_COL}: {row_cnt} rows, {row_cnt - kept_cnt} duplicates removed ({time.perf_counter() - start:.1f}s).")
+
+    def get_foreign_keys(self, tbl_name):
+        self.cursor.execute(
+            "SELECT CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL ORDER BY CONSTRAINT_NAME, ORDINAL_POSITION",
+            (self.db, tbl_name)
+        )
+        foreign_keys = {}
+        for const_name, col, ref_tbl, ref_col in self.cursor.fetchall():
+            fk_cols, _, ref_cols = foreign_keys.setdefault(const_name, ([], ref_tbl, []))
+            fk_cols.append(col)
+            ref_cols.append(ref_col)
+        return foreign_keys
+        
+    @staticmethod
+    def add_row_keys(cols_list, data_list, key_cols):
+        key_idx = [cols_list.index(col) for col in key_cols]
+        return [list(row) + [natural_key_hash([row[idx] for idx in key_idx])] for row in data_list]
+    
+    @staticmethod
+    def upsert_clause(cols_list):
+        updates = ', '.join(f"{col} = VALUES({col})" for col in cols_list if col != ROW_KEY_COL)
+        return f" ON DUPLICATE KEY UPDATE {updates}"
+    
+    def merge_infile(self, tbl_name, cols_list, data_list):
+        # Staging-table merge: LOAD DATA cannot upsert, so rows land in a session temporary table first. It is built
+        # from a SELECT rather than LIKE, since temporary tables cannot be partitioned and LIKE copies partitioning.
+        staging = f"stg_{tbl_name}"
+        cols = ', '.join(cols_list)
+        self.cursor.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging} SELECT {cols} FROM {tbl_name} LIMIT 0")
+        self.cursor.execute(f"TRUNCATE TABLE {staging}")
+        try:
+            self.load_infile(staging, cols, data_list)
+            self.cursor.execute(f"INSERT INTO {tbl_name} ({cols}) SELECT {cols} FROM {staging}{self.upsert_clause(cols_list)}")
+        finally:
+            self.cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging}")
+    
+    def load_infile(self, tbl_name, cols, data_list):
+        # row_key is written as hex and decoded server-side, since raw bytes do not survive a utf8mb4 text file.
+        cols_list = [col.strip() for col in cols.split(',')]
+        set_clause = ''
+        if ROW_KEY_COL in cols_list:
+            cols_list[cols_list.index(ROW_KEY_COL)] = f"@{ROW_KEY_COL}"
+            set_clause = f" SET {ROW_KEY_COL} = UNHEX(@{ROW_KEY_COL})"
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tsv', delete=False) as tmp:
+            for row in data_list:
+                tmp.write('\t'.join(self.escape_infile(value) for value in row) + '\n')
+        try:
+            self.cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {tbl_name} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({', '.join(cols_list)}){set_clause}",
+                (tmp.name,)
+            )
+        finally:
+            os.remove(tmp.name)
+            
+    @staticmethod
+    def escape_infile(value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, bytes):
+            return value.hex()
+        return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+            
+    def build_select(self, tbl_name, call_cols=None, start_date=None, end_date=None, region_codes=None, date_col=None, limit=None):
+        # Predicates are pushed into SQL as parameters; the date range is half-open [start_date, end_date).
+        cols = ", ".join(call_cols) if call_cols else "*"
+        if date_col is None:
+            date_col = (self.tbl_config.get(tbl_name, {}).get('dates') or ['contract_dte'])[0]
+        
+        clauses, params = [], []
+        if start_date is not None:
+            clauses.append(f"{date_col} >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append(f"{date_col} < %s")
+            params.append(end_date)
+        if region_codes:
+            clauses.append(f"region_code IN ({', '.join(['%s'] * len(region_codes))})")
+            params.extend(region_codes)
+        
+        query = f"SELECT {cols} FROM {tbl_name}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return query, params
+    
+    def iter_data(self, tbl_name, call_cols=None, chunksize=100000, dates=None, start_date=None, end_date=None, region_codes=None, limit=None, query=None, params=None):
+        # Rows are streamed from an unbuffered server-side cursor, so only one chunk is held client-side at a time.
         if query is None:
-            query = f"SELECT {call_cols} FROM {tbl_name} LIMIT {limit}"
-        else:
-            query = query
+            query, params = self.build_select(tbl_name, call_cols, start_date, end_date, region_codes, limit=limit)
+        
+        row_cnt = 0
+        with self.connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.SSCursor)
+            try:
+                cursor.execute(query, params or None)
+                columns = [desc[0] for desc in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        break
+                    chunk = pd.DataFrame.from_records(rows, columns=columns)
+                    for col in dates or []:
+                        if col in chunk:
+                            chunk[col] = pd.to_datetime(chunk[col])
+                    row_cnt += len(chunk)
+                    yield chunk
+            finally:
+                cursor.close()
+        self.logger.info(f"Stream {row_cnt} rows from {tbl_name}.")
+        
+    def import_data(self, tbl_name, call_cols, limit=None, dates=None, start_date=None, end_date=None, region_codes=None, chunksize=100000, query=None):
         try:
-            data = pd.read_sql(query, self.engine, parse_dates=dates)
+            chunks = list(self.iter_data(tbl_name, call_cols, chunksize=chunksize, dates=dates, start_date=start_date, end_date=end_date, region_codes=region_codes, limit=limit, query=query))
+            data = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=call_cols)
             self.logger.info(f"Import {len(data)} rows from {tbl_name}.")
             
             return data
@@ -152,7 +609,8 @@ if __name__ == '__main__':
     for tbl in tbl_list:
         dbm.create_table(tbl)
     dbm.set_pk(tbl_name='district_code', pk_col_name='region_code', const_name='pk_district_code')
-    dbm.set_fk(fk_tbl_name='trade', pk_tbl_name='district_code', fk_col_name='region_code', pk_col_name='region_code', const_name='fk_trade')
+    if not dbm.is_partitioned('trade'):
+        dbm.set_fk(fk_tbl_name='trade', pk_tbl_name='district_code', fk_col_name='region_code', pk_col_name='region_code', const_name='fk_trade')
     dbm.set_fk(fk_tbl_name='total_district_code', pk_tbl_name='district_code', fk_col_name='region_code', pk_col_name='region_code', const_name='fk_total_district_code')
     
     district_code = pd.read_csv('./docs/district_code_src/district_code.csv', encoding='cp949')
@@ -162,5 +620,5 @@ if __name__ == '__main__':
     total_district_code = pd.read_csv('./docs/district_code_src/total_district_code.csv', encoding='cp949')
     total_district_code = total_district_code.where((pd.notnull(total_district_code)), None)
     total_district_code = total_district_code.values.tolist()
-    dbm.insert_data('district_code', district_code)
-    dbm.insert_data('total_district_code', total_district_code)
\ No newline at end of file
+    dbm.bulk_insert('district_code', district_code)
+    dbm.bulk_insert('total_district_code', total_district_code)
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import sys
+import threading
+
+import pandas as pd
+
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.logger import Logger
+from modules.data.dbm import DBM
+from modules.data.preprocessor import TRADE_COLUMNS
+
+COMPLEX_KEY = ['region_code', 'umd_name', 'jibun', 'apt_name', 'con_year']
+FACT_COLUMNS = ['region_code', 'complex_id', 'contract_dte', 'apt_dong', 'floor', 'area', 'price']
+FACT_NATURAL_KEY = ['complex_id', 'contract_dte', 'apt_dong', 'floor', 'area', 'price']
+FACT_SCHEMAS = {
+    'id': 'BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY',
+    'region_code': 'VARCHAR(10) NOT NULL',
+    'complex_id': 'INT UNSIGNED NOT NULL',
+    'contract_dte': 'DATE NOT NULL',
+    'apt_dong': 'VARCHAR(50) NULL',
+    'floor': 'SMALLINT NOT NULL',
+    'area': 'SMALLINT UNSIGNED NOT NULL',
+    'price': 'INT UNSIGNED NOT NULL'
+}
+SOURCE_COLUMNS = TRADE_COLUMNS + ['umd_name', 'jibun']
+
+class ComplexDimension:
+    # apt_complex rows are never updated, so the key -> complex_id cache only grows and never goes stale.
+    # Binary NO PAD collation keeps MySQL's notion of a duplicate key identical to Python's.
+    def __init__(self, dbm: DBM, tbl_name: str = 'apt_complex'):
+        self.dbm = dbm
+        self.tbl_name = tbl_name
+        self.cache: Dict[Tuple, int] = {}
+        self.lock = threading.Lock()
+        self.logger = Logger().get_logger(module_name='modules.data.dbm')
+        self.create_table()
+        self.load()
+
+    def create_table(self) -> None:
+        self.dbm.create_database()
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.tbl_name} ("
+                    "complex_id INT UNSIGNED NOT NULL AUTO_INCREMENT, region_code VARCHAR(10) NOT NULL, umd_name VARCHAR(50) NOT NULL, "
+                    "jibun VARCHAR(20) NOT NULL, apt_name VARCHAR(100) NOT NULL, con_year SMALLINT NOT NULL, PRIMARY KEY (complex_id), "
+                    f"UNIQUE INDEX uq_{self.tbl_name} ({', '.join(COMPLEX_KEY)})"
+                    ") DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_bin"
+                )
+                conn.commit()
+            finally:
+                cursor.close()
+
+    def load(self, region_codes: Optional[List[str]] = None) -> int:
+        query = f"SELECT complex_id, {', '.join(COMPLEX_KEY)} FROM {self.tbl_name}"
+        params = None
+        if region_codes:
+            query += f" WHERE region_code IN ({', '.join(['%s'] * len(region_codes))})"
+            params = region_codes
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        self.cache.update({self.normalize(row[1:]): int(row[0]) for row in rows})
+        return len(rows)
+
+    @staticmethod
+    def normalize(key) -> Tuple:
+        return (str(key[0]), key[1], key[2], key[3], int(key[4]))
+
+    def resolve(self, frame: pd.DataFrame) -> List[int]:
+        keys = [self.normalize(key) for key in zip(*(frame[col] for col in COMPLEX_KEY))]
+        with self.lock:
+            missing = list(dict.fromkeys(key for key in keys if key not in self.cache))
+            if missing:
+                self.insert(missing)
+            return [self.cache[key] for key in keys]
+
+    def insert(self, keys: List[Tuple]) -> None:
+        # INSERT IGNORE lets workers race on the same new complex; ids are read back per region afterwards.
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(
+                    f"INSERT IGNORE INTO {self.tbl_name} ({', '.join(COMPLEX_KEY)}) VALUES ({', '.join(['%s'] * len(COMPLEX_KEY))})",
+                    keys
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        self.load(sorted({key[0] for key in keys}))
+        self.logger.debug(f"Add {len(keys)} complexes to {self.tbl_name} (cached: {len(self.cache)}).")
+
+class CompactTrade:
+    # Stores trades as (region_code, complex_id, date, numerics) in <view>_fact and exposes the wide TRADE_COLUMNS
+    # layout under the original table name as a view. District names come from district_code and the derived
+    # price/py columns are computed in the view, so none of them are stored per row.
+    def __init__(self, dbm: DBM, view_name: str = 'trade', fact_tbl: Optional[str] = None, dimension_tbl: str = 'apt_complex', district_tbl: str = 'district_code'):
+        self.dbm = dbm
+        self.view_name = view_name
+        self.fact_tbl = fact_tbl or f"{view_name}_fact"
+        self.district_tbl = district_tbl
+        self.logger = Logger().get_logger(module_name='modules.data.dbm')
+
+        # table_configs.json entries for the fact table take precedence over these defaults.
+        fact_config = self.dbm.tbl_config.setdefault(self.fact_tbl, {})
+        fact_config.setdefault('schemas', FACT_SCHEMAS)
+        fact_config.setdefault('list', FACT_COLUMNS)
+        fact_config.setdefault('natural_key', FACT_NATURAL_KEY)
+        fact_config.setdefault('dates', ['contract_dte'])
+        fact_config.setdefault('watermark', 'id')
+        fact_config.setdefault('indexes', {
+            f"idx_{self.fact_tbl}_region_dte": ['region_code', 'contract_dte'],
+            f"idx_{self.fact_tbl}_complex": ['complex_id']
+        })
+
+        self.dimension = ComplexDimension(dbm, dimension_tbl)
+        self.dbm.create_table(self.fact_tbl)
+        self.dbm.migrate_ingest_col(self.fact_tbl)
+        self.create_view()
+
+    def create_view(self) -> None:
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT table_type FROM information_schema.tables WHERE table_schema = %s AND table_name = %s", (self.dbm.db, self.view_name))
+                row = cursor.fetchone()
+                if row is not None and row[0] != 'VIEW':
+                    raise ValueError(f"{self.view_name} is a base table; rename it before switching to the compact layout.")
+                cursor.execute(
+                    f"CREATE OR REPLACE VIEW {self.view_name} AS SELECT "
+                    "f.id, f.region_code, f.contract_dte, f.ingested_at, d.addr_1 AS district, d.addr_1 AS cd_district, c.con_year, "
+                    "CONCAT_WS(' ', d.addr_2, c.umd_name, c.jibun, c.apt_name) AS address, c.apt_name, f.apt_dong, f.floor, f.area, f.price, "
+                    "f.price / 10000 AS price_unit, ROUND(f.price / f.area * 3.3) AS py, ROUND(f.price / f.area * 3.3) / 10000 AS py_unit "
+                    f"FROM {self.fact_tbl} f JOIN {self.dimension.tbl_name} c ON c.complex_id = f.complex_id "
+                    f"JOIN {self.district_tbl} d ON d.region_code = f.region_code"
+                )
+                conn.commit()
+                self.logger.info(f"Create view {self.view_name} over {self.fact_tbl}.")
+            finally:
+                cursor.close()
+
+    def transform(self, frame: pd.DataFrame) -> List[List[Any]]:
+        if frame.empty:
+            return []
+        fact = pd.DataFrame({
+            'region_code': frame['region_code'],
+            'complex_id': self.dimension.resolve(frame),
+            'contract_dte': frame['contract_dte'],
+            'apt_dong': frame['apt_dong'],
+            'floor': frame['floor'],
+            'area': frame['area'].astype('int64'),
+            'price': frame['price']
+        }, columns=FACT_COLUMNS)
+        fact = fact.astype(object).where(fact.notna(), None)
+        return fact.values.tolist()
@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+
+import pandas as pd
+
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.logger import Logger
+from modules.data.dbm import DBM
+
+SNAPSHOT_VERSION = 2
+
+_loaded: Dict[Tuple[str, str], pd.DataFrame] = {}
+_loaded_lock = threading.Lock()
+
+class DistrictSnapshot:
+    # Local JSON copy of the district_code table, so a crawler starts without a DB round trip. The file carries a
+    # format version, the database and column list, a SHA-256 of its rows (guards against partial or edited files)
+    # and the table's CHECKSUM TABLE value at export. Within max_age the file is trusted as is; after that one
+    # CHECKSUM TABLE query decides whether it is re-exported. District codes change a few times a year at most.
+    def __init__(self, dbm: DBM, tbl_name: str = 'district_code', path: Optional[str] = None, max_age: float = 7 * 86400):
+        self.dbm = dbm
+        self.tbl_name = tbl_name
+        self.path = path or f"./data/snapshot/{dbm.db}.{tbl_name}.json"
+        self.max_age = max_age
+        self.cols = list(self.dbm.tbl_config[tbl_name]['list'])
+        self.logger = Logger().get_logger(module_name='modules.data.dbm')
+
+    @staticmethod
+    def rows_checksum(rows: List[List[Any]]) -> str:
+        return hashlib.sha256(json.dumps(rows, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+    def read(self) -> Optional[dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('database') != self.dbm.db or snapshot.get('columns') != self.cols:
+            return None
+        if snapshot.get('checksum') != self.rows_checksum(snapshot.get('rows', [])):
+            self.logger.warning(f"District snapshot {self.path} failed its checksum; reloading from {self.tbl_name}.")
+            return None
+        return snapshot
+
+    def table_checksum(self) -> Optional[int]:
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"CHECKSUM TABLE {self.tbl_name}")
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        return int(row[1]) if row and row[1] is not None else None
+
+    def export(self, table_checksum: Optional[int] = None) -> dict:
+        data = self.dbm.import_data(tbl_name=self.tbl_name, call_cols=self.cols)
+        if data is None:
+            raise ValueError(f"Could not read {self.tbl_name} from {self.dbm.db}.")
+        rows = data.astype(object).where(data.notna(), None).values.tolist()
+        snapshot = {
+            'version': SNAPSHOT_VERSION, 'database': self.dbm.db, 'table': self.tbl_name, 'columns': self.cols, 'created_at': time.time(),
+            'table_checksum': table_checksum if table_checksum is not None else self.table_checksum(),
+            'checksum': self.rows_checksum(rows), 'rows': rows
+        }
+        self.write(snapshot)
+        self.logger.info(f"Snapshot {len(rows)} rows of {self.tbl_name} to {self.path}.")
+        return snapshot
+
+    def load(self) -> pd.DataFrame:
+        # Cached per process as well, so every Crawler/worker thread in it shares one frame.
+        key = (self.dbm.db, self.tbl_name)
+        with _loaded_lock:
+            if key not in _loaded:
+                _loaded[key] = self.load_snapshot()
+            return _loaded[key]
+
+    def load_snapshot(self) -> pd.DataFrame:
+        snapshot = self.read()
+        if snapshot is not None and time.time() - snapshot['created_at'] > self.max_age:
+            table_checksum = self.table_checksum()
+            if table_checksum != snapshot['table_checksum']:
+                snapshot = self.export(table_checksum)
+            else:
+                # An unchanged table only restarts the max_age clock.
+                snapshot['created_at'] = time.time()
+                self.write(snapshot)
+        if snapshot is None:
+            snapshot = self.export()
+        return pd.DataFrame(snapshot['rows'], columns=self.cols)
+
+    def write(self, snapshot: dict) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Per-process temporary name: worker processes may refresh the snapshot at the same time.
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path)
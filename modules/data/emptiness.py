@@ -0,0 +1,66 @@
+import os
+import json
+import time
+
+from typing import Dict, List
+
+class EmptinessIndex:
+    # Observed item counts per (region_code, deal_ymd), rebuilt from the task ledger after every crawl and kept in a
+    # JSON file so history survives a ledger reset. Regions are classified from their most recent `window` months:
+    # 'skip' when none of them had a trade, 'defer' when the smoothed empty rate is at least defer_threshold. A region
+    # with a trade tops out at window / (window + 2) (0.947 for 36 months), so the threshold must stay below that.
+    def __init__(self, path: str = './config/openapi/emptiness_index.json', min_observed: int = 24, defer_threshold: float = 0.9, window: int = 36):
+        self.path = path
+        self.min_observed = min_observed
+        self.defer_threshold = defer_threshold
+        self.window = window
+        self.months: Dict[str, Dict[str, int]] = {}
+        self.reports: List[dict] = []
+        self.load()
+
+    def update(self, history: Dict[str, Dict[str, int]]) -> None:
+        for region_code, months in history.items():
+            self.months.setdefault(region_code, {}).update(months)
+
+    def recent(self, region_code: str) -> List[int]:
+        return [cnt for _, cnt in sorted(self.months.get(region_code, {}).items())[-self.window:]]
+
+    def p_empty(self, region_code: str) -> float:
+        # Laplace-smoothed share of empty months, so a short all-empty history never reads as certainty.
+        counts = self.recent(region_code)
+        return (sum(1 for cnt in counts if not cnt) + 1) / (len(counts) + 2)
+
+    def classify(self, region_code: str) -> str:
+        counts = self.recent(region_code)
+        if len(counts) < self.min_observed:
+            return 'fetch'
+        if not any(counts):
+            return 'skip'
+        if self.p_empty(region_code) >= self.defer_threshold:
+            return 'defer'
+        return 'fetch'
+
+    def plan(self, region_codes: List[str]) -> Dict[str, List[str]]:
+        plan = {'fetch': [], 'defer': [], 'skip': []}
+        for region_code in region_codes:
+            plan[self.classify(region_code)].append(region_code)
+        return plan
+
+    def record(self, report: dict) -> None:
+        self.reports = (self.reports + [dict(report, crawled_at=time.time())])[-100:]
+
+    def save(self) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", 'w') as f:
+            json.dump({'months': self.months, 'reports': self.reports}, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.months = data.get('months', {})
+        self.reports = data.get('reports', [])
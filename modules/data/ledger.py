@@ -0,0 +1,245 @@
+import os
+import time
+import sqlite3
+import threading
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+
+TASK_STATES = ('pending', 'in_flight', 'done', 'failed', 'empty', 'deferred')
+
+class TaskLedger:
+    # Queries are written with '?' placeholders and SQLite syntax; DBTaskLedger swaps in the MySQL equivalents.
+    placeholder = '?'
+    insert_ignore = "INSERT OR IGNORE"
+    claim_lock = ""
+
+    def __init__(self, path: str = './config/openapi/task_ledger.sqlite3', worker_id: Optional[str] = None, lease_timeout: float = 3600.0):
+        self.path = path
+        self.worker_id = worker_id
+        self.lease_timeout = lease_timeout
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.create_table()
+
+    def create_table(self) -> None:
+        with self.transaction() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_task ("
+                "region_code VARCHAR(10) NOT NULL, deal_ymd CHAR(6) NOT NULL, state VARCHAR(10) NOT NULL DEFAULT 'pending', "
+                "attempts INTEGER NOT NULL DEFAULT 0, item_cnt INTEGER, error VARCHAR(255), worker_id VARCHAR(64), "
+                "started_at DOUBLE, finished_at DOUBLE, elapsed DOUBLE, "
+                "PRIMARY KEY (region_code, deal_ymd))"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_crawl_task_state ON crawl_task (state, deal_ymd)")
+
+    @contextmanager
+    def transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so a claim's SELECT and UPDATE are atomic across processes.
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            finally:
+                cursor.close()
+
+    def sql(self, query: str) -> str:
+        return query.replace('?', self.placeholder)
+
+    def seed(self, region_codes: Iterable[str], date_list: Iterable[str]) -> int:
+        date_list = list(date_list)
+        with self.transaction() as cursor:
+            cursor.executemany(
+                self.sql(f"{self.insert_ignore} INTO crawl_task (region_code, deal_ymd) VALUES (?, ?)"),
+                [(region_code, deal_ymd) for region_code in region_codes for deal_ymd in date_list]
+            )
+            return max(cursor.rowcount, 0)
+
+    def recover(self) -> int:
+        # Hands out again this worker's in-flight tasks (it crashed before flushing them) and any other worker's
+        # tasks whose lease has expired; live workers' in-flight tasks are left alone.
+        with self.transaction() as cursor:
+            cursor.execute(
+                self.sql("UPDATE crawl_task SET state = 'pending', started_at = NULL, worker_id = NULL "
+                         "WHERE state = 'in_flight' AND (worker_id = ? OR worker_id IS NULL OR started_at < ?)"),
+                (self.worker_id, time.time() - self.lease_timeout)
+            )
+            return cursor.rowcount
+
+    def retry_failed(self, max_attempts: Optional[int] = None) -> int:
+        with self.transaction() as cursor:
+            cursor.execute(
+                self.sql("UPDATE crawl_task SET state = 'pending' WHERE state = 'failed' AND attempts < ?"),
+                (max_attempts if max_attempts is not None else 2 ** 31 - 1,)
+            )
+            return cursor.rowcount
+
+    def claim(self, limit: int = 1, start_ymd: Optional[str] = None, end_ymd: Optional[str] = None) -> List[Tuple[str, str]]:
+        with self.transaction() as cursor:
+            cursor.execute(
+                self.sql("SELECT region_code, deal_ymd FROM crawl_task WHERE state = 'pending' AND deal_ymd >= ? AND deal_ymd <= ? "
+                         f"ORDER BY region_code, deal_ymd LIMIT ?{self.claim_lock}"),
+                (start_ymd or '000000', end_ymd or '999999', limit)
+            )
+            tasks = [tuple(row) for row in cursor.fetchall()]
+            if tasks:
+                cursor.executemany(
+                    self.sql("UPDATE crawl_task SET state = 'in_flight', attempts = attempts + 1, worker_id = ?, started_at = ?, error = NULL "
+                             "WHERE region_code = ? AND deal_ymd = ?"),
+                    [(self.worker_id, time.time(), region_code, deal_ymd) for region_code, deal_ymd in tasks]
+                )
+        return tasks
+
+    def complete(self, results: List[Tuple[str, str, int]]) -> None:
+        now = time.time()
+        with self.transaction() as cursor:
+            cursor.executemany(
+                self.sql("UPDATE crawl_task SET state = ?, item_cnt = ?, finished_at = ?, elapsed = ? - started_at "
+                         "WHERE region_code = ? AND deal_ymd = ?"),
+                [('done' if item_cnt else 'empty', item_cnt, now, now, region_code, deal_ymd) for region_code, deal_ymd, item_cnt in results]
+            )
+
+    def fail(self, region_code: str, deal_ymd: str, error: str = None) -> None:
+        now = time.time()
+        with self.transaction() as cursor:
+            cursor.execute(
+                self.sql("UPDATE crawl_task SET state = 'failed', error = ?, finished_at = ?, elapsed = ? - started_at "
+                         "WHERE region_code = ? AND deal_ymd = ?"),
+                (error[:255] if error else None, now, now, region_code, deal_ymd)
+            )
+
+    def defer(self, region_codes: List[str], start_ymd: Optional[str] = None, end_ymd: Optional[str] = None) -> int:
+        # Makes region_codes the deferred set for the range: their pending tasks are parked as 'deferred' (claim()
+        # never hands them out) and other regions' deferred tasks go back to 'pending'. Both happen in one
+        # transaction, so workers sharing the ledger never claim a task that is only between two plans.
+        start_ymd, end_ymd = start_ymd or '000000', end_ymd or '999999'
+        region_filter = f" AND region_code NOT IN ({', '.join(['?'] * len(region_codes))})" if region_codes else ""
+        with self.transaction() as cursor:
+            cursor.execute(
+                self.sql(f"UPDATE crawl_task SET state = 'pending' WHERE state = 'deferred' AND deal_ymd >= ? AND deal_ymd <= ?{region_filter}"),
+                (start_ymd, end_ymd, *region_codes)
+            )
+            if region_codes:
+                cursor.execute(
+                    self.sql(f"UPDATE crawl_task SET state = 'deferred' WHERE state = 'pending' AND deal_ymd >= ? AND deal_ymd <= ? "
+                             f"AND region_code IN ({', '.join(['?'] * len(region_codes))})"),
+                    (start_ymd, end_ymd, *region_codes)
+                )
+            cursor.execute(self.sql("SELECT COUNT(*) FROM crawl_task WHERE state = 'deferred' AND deal_ymd >= ? AND deal_ymd <= ?"), (start_ymd, end_ymd))
+            return int(cursor.fetchone()[0])
+
+    def release(self, start_ymd: Optional[str] = None, end_ymd: Optional[str] = None, region_codes: Optional[List[str]] = None,
+                limit: Optional[int] = None, per_region: Optional[int] = None) -> List[Tuple[str, str]]:
+        # Returns deferred tasks to 'pending', newest month first; per_region caps the months released per region,
+        # so a limit is spread over regions' latest months instead of one region's whole history.
+        query = "SELECT region_code, deal_ymd FROM crawl_task WHERE state = 'deferred' AND deal_ymd >= ? AND deal_ymd <= ?"
+        params = [start_ymd or '000000', end_ymd or '999999']
+        if region_codes is not None:
+            if not region_codes:
+                return []
+            query += f" AND region_code IN ({', '.join(['?'] * len(region_codes))})"
+            params.extend(region_codes)
+        with self.transaction() as cursor:
+            cursor.execute(self.sql(query + " ORDER BY deal_ymd DESC, region_code"), params)
+            tasks = [tuple(row) for row in cursor.fetchall()]
+            if per_region is not None:
+                selected, taken = [], {}
+                for region_code, deal_ymd in tasks:
+                    if taken.get(region_code, 0) < per_region:
+                        taken[region_code] = taken.get(region_code, 0) + 1
+                        selected.append((region_code, deal_ymd))
+                tasks = selected
+            tasks = tasks[:limit] if limit is not None else tasks
+            if tasks:
+                cursor.executemany(
+                    self.sql("UPDATE crawl_task SET state = 'pending' WHERE region_code = ? AND deal_ymd = ? AND state = 'deferred'"),
+                    tasks
+                )
+        return tasks
+
+    def history(self) -> Dict[str, Dict[str, int]]:
+        with self.transaction() as cursor:
+            cursor.execute("SELECT region_code, deal_ymd, item_cnt FROM crawl_task WHERE state IN ('done', 'empty')")
+            rows = cursor.fetchall()
+        history = {}
+        for region_code, deal_ymd, item_cnt in rows:
+            history.setdefault(region_code, {})[deal_ymd] = int(item_cnt or 0)
+        return history
+
+    def item_counts(self, tasks: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[int]]:
+        with self.transaction() as cursor:
+            counts = {}
+            for region_code, deal_ymd in tasks:
+                cursor.execute(self.sql("SELECT item_cnt FROM crawl_task WHERE region_code = ? AND deal_ymd = ?"), (region_code, deal_ymd))
+                row = cursor.fetchone()
+                counts[(region_code, deal_ymd)] = row[0] if row else None
+            return counts
+
+    def max_item_counts(self) -> Dict[str, int]:
+        with self.transaction() as cursor:
+            cursor.execute("SELECT region_code, MAX(item_cnt) FROM crawl_task WHERE item_cnt IS NOT NULL GROUP BY region_code")
+            return {region_code: int(item_cnt) for region_code, item_cnt in cursor.fetchall()}
+
+    def counts(self, start_ymd: Optional[str] = None, end_ymd: Optional[str] = None) -> Dict[str, int]:
+        with self.transaction() as cursor:
+            cursor.execute(
+                self.sql("SELECT state, COUNT(*) FROM crawl_task WHERE deal_ymd >= ? AND deal_ymd <= ? GROUP BY state"),
+                (start_ymd or '000000', end_ymd or '999999')
+            )
+            rows = cursor.fetchall()
+        counts = {state: 0 for state in TASK_STATES}
+        counts.update({state: int(cnt) for state, cnt in rows})
+        return counts
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+class DBTaskLedger(TaskLedger):
+    # Same ledger in MySQL, shared by workers on different hosts. Claims use FOR UPDATE SKIP LOCKED (MySQL 8.0+),
+    # so concurrent workers never block on or hand out the same pending rows.
+    placeholder = '%s'
+    insert_ignore = "INSERT IGNORE"
+    claim_lock = " FOR UPDATE SKIP LOCKED"
+
+    def __init__(self, dbm, worker_id: Optional[str] = None, lease_timeout: float = 3600.0):
+        self.dbm = dbm
+        self.worker_id = worker_id
+        self.lease_timeout = lease_timeout
+        self.dbm.create_database()
+        self.create_table()
+
+    def create_table(self) -> None:
+        with self.transaction() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_task ("
+                "region_code VARCHAR(10) NOT NULL, deal_ymd CHAR(6) NOT NULL, state VARCHAR(10) NOT NULL DEFAULT 'pending', "
+                "attempts INT NOT NULL DEFAULT 0, item_cnt INT NULL, error VARCHAR(255) NULL, worker_id VARCHAR(64) NULL, "
+                "started_at DOUBLE NULL, finished_at DOUBLE NULL, elapsed DOUBLE NULL, "
+                "PRIMARY KEY (region_code, deal_ymd), KEY idx_crawl_task_state (state, deal_ymd))"
+            )
+
+    @contextmanager
+    def transaction(self):
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,76 @@
+import io
+
+from typing import Dict, Iterator, List, Optional
+from dataclasses import dataclass, field
+from lxml import etree
+
+ITEM_TAG = 'item'
+ITEM_FIELDS = (
+    'dealYear', 'dealMonth', 'dealDay', 'dealAmount', 'excluUseAr', 'sggCd',
+    'umdNm', 'jibun', 'buildYear', 'aptNm', 'floor', 'aptDong'
+)
+HEADER_FIELDS = ('resultCode', 'resultMsg', 'totalCount', 'numOfRows', 'pageNo')
+# '03' (NODATA_ERROR) is how some endpoints answer a month without deals; it is an empty result, not a failure.
+SUCCESS_CODES = {'000', '00'}
+NODATA_CODES = {'03'}
+
+@dataclass
+class ParsedResponse:
+    result_code: str = 'Unknown'
+    result_msg: str = 'Unknown'
+    total_count: int = 0
+    items: List[Dict[str, Optional[str]]] = field(default_factory=list)
+
+def iter_items(content: bytes, header: Dict[str, str], fields=ITEM_FIELDS) -> Iterator[Dict[str, Optional[str]]]:
+    # Single pass over the document: each <item> becomes a plain dict and is cleared together with its
+    # already-consumed siblings, so memory stays flat regardless of numOfRows. Header tags are written into
+    # `header` as they stream past (totalCount comes after the items in this API's responses).
+    wanted = set(fields)
+    record = {}
+    for _, elem in etree.iterparse(io.BytesIO(content), events=('end',)):
+        tag = elem.tag
+        if tag == ITEM_TAG:
+            yield {name: record.get(name) for name in fields}
+            record = {}
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        elif tag in wanted:
+            text = elem.text
+            record[tag] = text.strip() if text else None
+        elif tag in HEADER_FIELDS:
+            header[tag] = elem.text.strip() if elem.text else ''
+            elem.clear()
+
+def parse_response(content: bytes, fields=ITEM_FIELDS) -> ParsedResponse:
+    header = {}
+    items = list(iter_items(content, header, fields))
+    total_count = header.get('totalCount')
+
+    return ParsedResponse(
+        result_code=header.get('resultCode', 'Unknown'),
+        result_msg=header.get('resultMsg', 'Unknown'),
+        total_count=int(total_count) if total_count else 0,
+        items=items
+    )
+
+def read_total_count(content: bytes) -> int:
+    # Header peek for pagination without parsing the items; totalCount follows <items>, so search from the end.
+    start = content.rfind(b'<totalCount>')
+    if start < 0:
+        return 0
+    end = content.find(b'</totalCount>', start)
+    try:
+        return int(content[start + len(b'<totalCount>'):end].strip() or 0)
+    except ValueError:
+        return 0
+
+def read_result_code(content: bytes) -> str:
+    # Header peek used to classify a response before it is parsed. Gateway errors (quota, unregistered key) come
+    # back as <OpenAPI_ServiceResponse> with a returnReasonCode instead of resultCode.
+    for tag in (b'resultCode', b'returnReasonCode'):
+        start = content.find(b'<' + tag + b'>')
+        if start >= 0:
+            end = content.find(b'</' + tag + b'>', start)
+            return content[start + len(tag) + 2:end].strip().decode('utf-8', 'replace')
+    return 'Unknown'
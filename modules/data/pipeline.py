@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import queue
+import threading
+
+import pandas as pd
+
+from typing import Any, Dict, Iterator, List, Optional
+from dataclasses import dataclass, field
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.data.parser import parse_response, SUCCESS_CODES, NODATA_CODES
+from modules.data.preprocessor import Preprocessor, TRADE_COLUMNS
+
+STOP = object()
+
+@dataclass
+class ParsedBatch:
+    result_code: str
+    result_msg: str
+    total_count: int
+    item_cnt: int
+    rows: List[List[Any]] = field(default_factory=list)
+    dropped: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+    preprocess_elapsed: float = 0.0
+
+def parse_content(contents: List[bytes], preprocessor: Preprocessor, columns: List[str] = TRADE_COLUMNS) -> ParsedBatch:
+    # All pages of one (district, month) are parsed together. Rows are only built when every page succeeded and
+    # the pages add up to totalCount; the caller decides what the other cases mean. A no-data page is not a failure.
+    start = time.perf_counter()
+    pages = [parse_response(content) for content in contents]
+    failed = next((page for page in pages if page.result_code not in SUCCESS_CODES | NODATA_CODES), pages[0])
+    items = [item for page in pages for item in page.items]
+    batch = ParsedBatch(failed.result_code, failed.result_msg, pages[0].total_count, len(items))
+    if failed.result_code in SUCCESS_CODES and items and batch.total_count == len(items):
+        preprocess_start = time.perf_counter()
+        frame, batch.dropped = preprocessor.transform_frame(items, columns=columns)
+        batch.rows = frame.astype(object).where(frame.notna(), None).values.tolist()
+        batch.preprocess_elapsed = time.perf_counter() - preprocess_start
+    batch.elapsed = time.perf_counter() - start
+    return batch
+
+_worker_preprocessor: Optional[Preprocessor] = None
+
+def init_parse_worker(district_code: pd.DataFrame) -> None:
+    global _worker_preprocessor
+    _worker_preprocessor = Preprocessor(district_code)
+
+def parse_in_worker(contents: List[bytes], columns: List[str] = TRADE_COLUMNS) -> ParsedBatch:
+    return parse_content(contents, _worker_preprocessor, columns)
+
+def put_until(q: queue.Queue, item: Any, stop: threading.Event, timeout: float = 0.5) -> bool:
+    # Blocking put (backpressure) that still gives up once another stage has failed.
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def iter_queue(q: queue.Queue, stop: threading.Event, timeout: float = 0.5) -> Iterator[Any]:
+    while not stop.is_set():
+        try:
+            item = q.get(timeout=timeout)
+        except queue.Empty:
+            continue
+        if item is STOP:
+            return
+        yield item
+
+class StageStats:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, elapsed: float, items: int = 1) -> None:
+        with self.lock:
+            self.items += items
+            self.busy += elapsed
+
+    def utilization(self, wall: float) -> float:
+        # Share of the stage's worker-seconds spent working; a stage near 100% while its input queue is full
+        # is the bottleneck.
+        return self.busy / (wall * self.workers) if wall > 0 else 0.0
+
+class PipelineMonitor:
+    def __init__(self, stages: List[StageStats], queues: Dict[str, queue.Queue], logger, interval: float = 30.0):
+        self.stages = stages
+        self.queues = queues
+        self.logger = logger
+        self.interval = interval
+        self.start_time = time.monotonic()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='pipeline-monitor', daemon=True)
+
+    def start(self) -> None:
+        self.start_time = time.monotonic()
+        self.thread.start()
+
+    def run(self) -> None:
+        while not self.done.wait(self.interval):
+            self.logger.info(f"Pipeline: {self.format()}")
+
+    def stop(self) -> None:
+        self.done.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.logger.info(f"Pipeline finished: {self.format()}")
+
+    def report(self) -> Dict[str, Any]:
+        wall = time.monotonic() - self.start_time
+        return {
+            'elapsed': wall,
+            'stages': {
+                stage.name: {'workers': stage.workers, 'items': stage.items, 'busy': stage.busy, 'utilization': stage.utilization(wall)}
+                for stage in self.stages
+            },
+            'queues': {name: {'depth': q.qsize(), 'maxsize': q.maxsize} for name, q in self.queues.items()}
+        }
+
+    def format(self) -> str:
+        report = self.report()
+        stages = ' | '.join(
+            f"{name} x{stage['workers']}: {stage['items']} items, {stage['utilization']:.0%} busy" for name, stage in report['stages'].items()
+        )
+        queues = ' | '.join(f"{name}: {q['depth']}/{q['maxsize']}" for name, q in report['queues'].items())
+        return f"{stages} || queues {queues} ({report['elapsed']:.0f}s)"
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pandas as pd
+
+from typing import Any, Dict, List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.data.parser import ITEM_FIELDS
+
+ESSENTIAL_FIELDS = [
+    'dealYear', 'dealMonth', 'dealDay', 'dealAmount', 'excluUseAr', 'sggCd',
+    'umdNm', 'jibun', 'buildYear', 'aptNm', 'floor'
+]
+TRADE_COLUMNS = [
+    'region_code', 'contract_dte', 'district', 'cd_district', 'con_year', 'address',
+    'apt_name', 'apt_dong', 'floor', 'area', 'price', 'price_unit', 'py', 'py_unit'
+]
+TRADE_NATURAL_KEY = ['region_code', 'contract_dte', 'apt_name', 'apt_dong', 'floor', 'area', 'price']
+
+def build_district_index(district_code: pd.DataFrame) -> Dict[str, Tuple[str, str]]:
+    # region_code -> (addr_1, addr_2); the first row wins, as with the previous `.iloc[0]` lookup.
+    district_code = district_code.drop_duplicates(subset='region_code', keep='first')
+    return dict(zip(district_code['region_code'].astype(str), zip(district_code['addr_1'], district_code['addr_2'])))
+
+class Preprocessor:
+    def __init__(self, district_code: pd.DataFrame):
+        self.district_index = build_district_index(district_code)
+        self.addr_1 = {code: addr[0] for code, addr in self.district_index.items()}
+        self.addr_2 = {code: addr[1] for code, addr in self.district_index.items()}
+
+    def transform_frame(self, items: List[Dict[str, Any]], columns: List[str] = TRADE_COLUMNS) -> Tuple[pd.DataFrame, Dict[str, int]]:
+        raw = pd.DataFrame.from_records(items, columns=list(ITEM_FIELDS))
+        dropped = {'missing': 0, 'invalid': 0, 'unknown_district': 0}
+
+        essential = raw[ESSENTIAL_FIELDS]
+        has_essential = (essential.notna() & (essential != '')).all(axis=1)
+        dropped['missing'] = int((~has_essential).sum())
+        raw = raw[has_essential]
+
+        year = pd.to_numeric(raw['dealYear'], errors='coerce')
+        month = pd.to_numeric(raw['dealMonth'], errors='coerce')
+        day = pd.to_numeric(raw['dealDay'], errors='coerce')
+        price = pd.to_numeric(raw['dealAmount'].str.replace(',', '', regex=False), errors='coerce')
+        area = pd.to_numeric(raw['excluUseAr'], errors='coerce').round(0)
+        con_year = pd.to_numeric(raw['buildYear'], errors='coerce')
+        floor = pd.to_numeric(raw['floor'], errors='coerce').abs()
+        contract_dte = pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day}), errors='coerce')
+
+        is_valid = (
+            price.notna() & area.notna() & (area != 0) & con_year.notna() & floor.notna() & contract_dte.notna()
+        )
+        dropped['invalid'] = int((~is_valid).sum())
+
+        code = raw['sggCd']
+        district = code.map(self.addr_1)
+        is_matched = is_valid & district.notna()
+        dropped['unknown_district'] = int((is_valid & district.isna()).sum())
+
+        raw = raw[is_matched]
+        price = price[is_matched].astype('int64')
+        area = area[is_matched]
+        py = (price / area * 3.3).round(0)
+        apt_name = raw['aptNm'].str.replace(r'\(.*?\)', '', regex=True)
+        district = district[is_matched]
+
+        frame = pd.DataFrame({
+            'region_code': raw['sggCd'],
+            'contract_dte': contract_dte[is_matched].dt.strftime('%Y-%m-%d'),
+            'district': district,
+            'cd_district': district,
+            'con_year': con_year[is_matched].astype('int64'),
+            'address': raw['sggCd'].map(self.addr_2) + ' ' + raw['umdNm'] + ' ' + raw['jibun'] + ' ' + apt_name,
+            'apt_name': apt_name,
+            'apt_dong': raw['aptDong'],
+            'floor': floor[is_matched].astype('int64'),
+            'area': area,
+            'price': price,
+            'price_unit': price / 10000,
+            'py': py,
+            'py_unit': py / 10000,
+            'umd_name': raw['umdNm'],
+            'jibun': raw['jibun']
+        }, columns=columns)
+
+        return frame, dropped
+
+    def transform(self, items: List[Dict[str, Any]]) -> Tuple[List[List[Any]], Dict[str, int]]:
+        frame, dropped = self.transform_frame(items)
+        frame = frame.astype(object).where(frame.notna(), None)
+
+        return frame.values.tolist(), dropped
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+import datetime as dt
+
+from typing import Dict, Optional
+from contextlib import contextmanager
+
+class QuotaLedger:
+    # Daily call counter per service key shared by every process on the host through one SQLite file.
+    # DBQuotaLedger keeps the same counters in MySQL for workers spread across hosts.
+    placeholder = '?'
+    insert_ignore = "INSERT OR IGNORE"
+
+    def __init__(self, path: str = './config/openapi/quota_ledger.sqlite3'):
+        self.path = path
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.create_table()
+
+    def create_table(self) -> None:
+        with self.transaction() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS api_quota ("
+                "service_key VARCHAR(255) NOT NULL, usage_date CHAR(10) NOT NULL, used INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (service_key, usage_date))"
+            )
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            finally:
+                cursor.close()
+
+    def sql(self, query: str) -> str:
+        return query.replace('?', self.placeholder)
+
+    def reserve(self, service_key: str, limit: int, calls: int = 1, usage_date: Optional[dt.date] = None) -> bool:
+        # The conditional UPDATE is the reservation: it only matches while used + calls stays within limit,
+        # so no interleaving of workers can push a key past its daily quota.
+        usage_date = (usage_date or dt.datetime.now().date()).isoformat()
+        with self.transaction() as cursor:
+            cursor.execute(self.sql(f"{self.insert_ignore} INTO api_quota (service_key, usage_date, used) VALUES (?, ?, 0)"), (service_key, usage_date))
+            cursor.execute(
+                self.sql("UPDATE api_quota SET used = used + ? WHERE service_key = ? AND usage_date = ? AND used + ? <= ?"),
+                (calls, service_key, usage_date, calls, limit)
+            )
+            return cursor.rowcount == 1
+
+    def usage(self, usage_date: Optional[dt.date] = None) -> Dict[str, int]:
+        usage_date = (usage_date or dt.datetime.now().date()).isoformat()
+        with self.transaction() as cursor:
+            cursor.execute(self.sql("SELECT service_key, used FROM api_quota WHERE usage_date = ?"), (usage_date,))
+            return {service_key: int(used) for service_key, used in cursor.fetchall()}
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+class DBQuotaLedger(QuotaLedger):
+    placeholder = '%s'
+    insert_ignore = "INSERT IGNORE"
+
+    def __init__(self, dbm):
+        self.dbm = dbm
+        self.dbm.create_database()
+        self.create_table()
+
+    @contextmanager
+    def transaction(self):
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+import shutil
+import itertools
+
+import pandas as pd
+
+from typing import TYPE_CHECKING, Dict, List, Optional
+from decimal import Decimal
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.logger import Logger
+from modules.data.dbm import DBM
+from modules.data.sync import sync_generations
+
+MANIFEST = '_manifest.json'
+
+def partitioning():
+    # pyarrow is imported on first snapshot use only, so modules that merely construct a SnapshotStore (EDA) do
+    # not pay for it at import time.
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([('year', pa.int32()), ('region_code', pa.string())]), flavor='hive')
+
+class SnapshotStore:
+    # Arrow IPC (Feather v2) files under <root>/<tbl>/year=YYYY/region_code=XXXXX/, read back through memory-mapped
+    # files with partition pruning. A manifest records the table watermark the snapshot was taken at.
+    def __init__(self, dbm: DBM, tbl_name: str, root: str = './data/snapshot', watermark_col: Optional[str] = None):
+        self.dbm = dbm
+        self.tbl_name = tbl_name
+        self.path = os.path.join(root, tbl_name)
+        self.manifest_path = os.path.join(self.path, MANIFEST)
+        self.tbl_config = dbm.tbl_config.get(tbl_name, {})
+        self.date_col = (self.tbl_config.get('dates') or ['contract_dte'])[0]
+        self.watermark_col = watermark_col or self.tbl_config.get('watermark')
+        self.logger = Logger().get_logger(module_name='modules.data.dbm')
+
+    def watermark(self) -> Dict[str, Optional[int]]:
+        # MAX(<watermark>) on an indexed id is an index lookup; COUNT(*) is the fallback when none is configured.
+        # Neither moves when a delta sync rewrites a slice with as many rows, so the sync generation is part of it.
+        expr = f"MAX({self.watermark_col})" if self.watermark_col else "COUNT(*)"
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT {expr} FROM {self.tbl_name}")
+                value = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+        sync_generation = sum(sync_generations(self.dbm, f"{self.tbl_name}_sync").values())
+        return {'column': self.watermark_col or 'count', 'value': int(value) if value is not None else None, 'sync_generation': sync_generation}
+
+    def read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self) -> bool:
+        manifest = self.read_manifest()
+        return manifest is not None and manifest['watermark'] == self.watermark()
+
+    def export(self, chunksize: int = 200000) -> int:
+        # Written to a sibling directory and swapped in at the end, so readers never see a half-written snapshot.
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        watermark = self.watermark()
+        tmp_path = f"{self.path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        start = time.perf_counter()
+
+        chunks = self.dbm.iter_data(self.tbl_name, self.tbl_config.get('list'), chunksize=chunksize, dates=[self.date_col])
+        first = next(chunks, None)
+        if first is None:
+            self.logger.info(f"Snapshot of {self.tbl_name} skipped: table is empty.")
+            return 0
+        first = self.to_arrow(first)
+        schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in first.schema])
+
+        row_cnt = 0
+        def batches():
+            nonlocal row_cnt
+            for table in itertools.chain([first], map(self.to_arrow, chunks)):
+                row_cnt += table.num_rows
+                yield from table.cast(schema).to_batches()
+
+        ds.write_dataset(
+            batches(), tmp_path, schema=schema, format='ipc', partitioning=partitioning(),
+            max_partitions=100000, existing_data_behavior='overwrite_or_ignore'
+        )
+        with open(os.path.join(tmp_path, MANIFEST), 'w') as f:
+            json.dump({'table': self.tbl_name, 'watermark': watermark, 'rows': row_cnt, 'created_at': time.time()}, f, indent=4)
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(tmp_path, self.path)
+        self.logger.info(f"Snapshot {row_cnt} rows of {self.tbl_name} to {self.path} ({time.perf_counter() - start:.1f}s).")
+        return row_cnt
+
+    def to_arrow(self, chunk: pd.DataFrame) -> 'pa.Table':
+        import pyarrow as pa
+        chunk['year'] = chunk[self.date_col].dt.year.astype('int32')
+        chunk['region_code'] = chunk['region_code'].astype(str)
+        # DECIMAL columns arrive as Decimal objects whose inferred precision can differ between chunks.
+        for col in chunk.columns[chunk.dtypes == object]:
+            sample = chunk[col].dropna()
+            if not sample.empty and isinstance(sample.iloc[0], Decimal):
+                chunk[col] = chunk[col].astype(float)
+        return pa.Table.from_pandas(chunk, preserve_index=False)
+
+    def load(self, columns: Optional[List[str]] = None, years: Optional[List[int]] = None, region_codes: Optional[List[str]] = None) -> pd.DataFrame:
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+        dataset = ds.dataset(
+            self.path, format='ipc', partitioning=partitioning(),
+            filesystem=fs.LocalFileSystem(use_mmap=True)
+        )
+        condition = None
+        if years:
+            condition = ds.field('year').isin([int(year) for year in years])
+        if region_codes:
+            region_filter = ds.field('region_code').isin([str(code) for code in region_codes])
+            condition = region_filter if condition is None else condition & region_filter
+
+        start = time.perf_counter()
+        data = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        if columns is None:
+            data = data[[col for col in self.tbl_config.get('list', data.columns) if col in data]]
+        self.logger.info(f"Load {len(data)} rows of {self.tbl_name} from snapshot ({time.perf_counter() - start:.2f}s).")
+        return data
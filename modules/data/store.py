@@ -0,0 +1,107 @@
+import os
+import zlib
+import time
+import sqlite3
+import hashlib
+import threading
+
+from typing import Iterator, List, Optional, Tuple
+
+class ResponseStore:
+    def __init__(self, path: str = './data/raw/responses.sqlite3', ttl_days: Optional[float] = None, compress_level: int = 6):
+        self.path = path
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.compress_level = compress_level
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Same busy timeout as the task ledger: worker processes share the file and queue up on its write lock.
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "lawd_cd TEXT NOT NULL, deal_ymd TEXT NOT NULL, page_no INTEGER NOT NULL, "
+            "sha256 TEXT NOT NULL, fetched_at REAL NOT NULL, raw_size INTEGER NOT NULL, body BLOB NOT NULL, "
+            "PRIMARY KEY (lawd_cd, deal_ymd, page_no))"
+        )
+        self.conn.commit()
+
+    def put(self, lawd_cd: str, deal_ymd: str, page_no: int, content: bytes) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        body = zlib.compress(content, self.compress_level)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (lawd_cd, deal_ymd, page_no, sha256, fetched_at, raw_size, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (lawd_cd, deal_ymd, page_no, digest, time.time(), len(content), body)
+            )
+            self.conn.commit()
+        return digest
+
+    def put_pages(self, lawd_cd: str, deal_ymd: str, contents: List[bytes]) -> None:
+        # Replaces every page of one (district, month); pages beyond the new page count are left over from a
+        # fetch with a different numOfRows and would no longer add up to totalCount on replay.
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO responses (lawd_cd, deal_ymd, page_no, sha256, fetched_at, raw_size, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (lawd_cd, deal_ymd, page_no, hashlib.sha256(content).hexdigest(), time.time(), len(content), zlib.compress(content, self.compress_level))
+                    for page_no, content in enumerate(contents, 1)
+                ]
+            )
+            self.conn.execute("DELETE FROM responses WHERE lawd_cd = ? AND deal_ymd = ? AND page_no > ?", (lawd_cd, deal_ymd, len(contents)))
+            self.conn.commit()
+
+    def get(self, lawd_cd: str, deal_ymd: str, page_no: int = 1) -> Optional[bytes]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, fetched_at FROM responses WHERE lawd_cd = ? AND deal_ymd = ? AND page_no = ?",
+                (lawd_cd, deal_ymd, page_no)
+            ).fetchone()
+        if row is None or self.is_expired(row[1]):
+            return None
+        return zlib.decompress(row[0])
+
+    def keys(self, lawd_cds: Optional[List[str]] = None, start_ymd: Optional[str] = None, end_ymd: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        query, params = self.build_filter("SELECT lawd_cd, deal_ymd, page_no, fetched_at FROM responses", lawd_cds, start_ymd, end_ymd)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY lawd_cd, deal_ymd, page_no", params).fetchall()
+        return [(lawd_cd, deal_ymd, page_no) for lawd_cd, deal_ymd, page_no, fetched_at in rows if not self.is_expired(fetched_at)]
+
+    def iter_responses(self, lawd_cds: Optional[List[str]] = None, start_ymd: Optional[str] = None, end_ymd: Optional[str] = None) -> Iterator[Tuple[str, str, int, bytes]]:
+        # Bodies are fetched one at a time by key so a full-history replay never loads the whole store.
+        for lawd_cd, deal_ymd, page_no in self.keys(lawd_cds, start_ymd, end_ymd):
+            content = self.get(lawd_cd, deal_ymd, page_no)
+            if content is not None:
+                yield lawd_cd, deal_ymd, page_no, content
+
+    def evict_expired(self) -> int:
+        if self.ttl is None:
+            return 0
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.ttl,))
+            self.conn.commit()
+        return cursor.rowcount
+
+    def is_expired(self, fetched_at: float) -> bool:
+        return self.ttl is not None and fetched_at < time.time() - self.ttl
+
+    @staticmethod
+    def build_filter(query, lawd_cds, start_ymd, end_ymd):
+        clauses, params = [], []
+        if lawd_cds:
+            clauses.append(f"lawd_cd IN ({', '.join(['?'] * len(lawd_cds))})")
+            params.extend(lawd_cds)
+        if start_ymd is not None:
+            clauses.append("deal_ymd >= ?")
+            params.append(start_ymd)
+        if end_ymd is not None:
+            clauses.append("deal_ymd <= ?")
+            params.append(end_ymd)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return query, params
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,140 @@
+import os
+import sys
+import hashlib
+import datetime as dt
+
+import pandas as pd
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.utils import natural_key_hash
+from modules.data.dbm import DBM
+
+def trailing_months(months: int, end: Optional[dt.date] = None) -> List[str]:
+    end = end or dt.date.today()
+    return [period.strftime('%Y%m') for period in pd.period_range(end=pd.Period(end, freq='M'), periods=months, freq='M')]
+
+def month_range(deal_ym: str) -> Tuple[str, str]:
+    start = pd.Timestamp(f"{deal_ym}01")
+    return start.strftime('%Y-%m-%d'), (start + pd.offsets.MonthBegin(1)).strftime('%Y-%m-%d')
+
+def sync_generations(dbm: DBM, sync_tbl: str) -> Dict[Tuple[str, str], int]:
+    # (region_code, deal_ym) -> how often a sync rewrote the slice. Rewritten rows get new auto-increment ids and the
+    # row count may not change, so readers caching per-slice results (stats, snapshots) compare against this instead.
+    with dbm.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SHOW TABLES LIKE %s", (sync_tbl,))
+            if not cursor.fetchone():
+                return {}
+            cursor.execute(f"SELECT region_code, deal_ym, generation FROM {sync_tbl} WHERE generation > 0")
+            return {(str(region_code), deal_ym): int(generation) for region_code, deal_ym, generation in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+class DeltaSync:
+    # Fingerprints each (region_code, month) slice of tbl as the MD5 of its sorted natural-key hashes, so the same
+    # deals give the same fingerprint whether they come from the API or from the table, in any order. Fingerprints of
+    # synced slices are kept in <tbl>_sync and written in the same transaction as the slice itself, together with a
+    # generation counter bumped on every rewrite.
+    def __init__(self, dbm: DBM, tbl_name: str, key_cols: List[str], sync_tbl: Optional[str] = None, date_col: str = 'contract_dte'):
+        self.dbm = dbm
+        self.tbl_name = tbl_name
+        self.key_cols = key_cols
+        self.sync_tbl = sync_tbl or f"{tbl_name}_sync"
+        self.date_col = date_col
+        self.cols = list(self.dbm.tbl_config[tbl_name]['list'])
+        self.create_table()
+
+    def create_table(self) -> None:
+        self.dbm.create_database()
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.sync_tbl} ("
+                    "region_code VARCHAR(10) NOT NULL, deal_ym CHAR(6) NOT NULL, fingerprint BINARY(16) NOT NULL, "
+                    "row_cnt INT UNSIGNED NOT NULL, generation INT UNSIGNED NOT NULL DEFAULT 0, synced_at DATETIME NOT NULL, "
+                    "PRIMARY KEY (region_code, deal_ym))"
+                )
+                conn.commit()
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def fingerprint(key_rows: Iterable[Iterable[Any]]) -> bytes:
+        digest = hashlib.md5()
+        for key in sorted(natural_key_hash(row) for row in key_rows):
+            digest.update(key)
+        return digest.digest()
+
+    def row_fingerprint(self, rows: List[List[Any]]) -> bytes:
+        key_idx = [self.cols.index(col) for col in self.key_cols]
+        return self.fingerprint([row[idx] for idx in key_idx] for row in rows)
+
+    def dedupe(self, rows: List[List[Any]]) -> List[List[Any]]:
+        # Deals sharing a natural key are stored once by the row_key upsert (the later one wins), so the slice is
+        # fingerprinted and written the same way; otherwise it would never match the table and fail on its own keys.
+        key_idx = [self.cols.index(col) for col in self.key_cols]
+        return list({natural_key_hash([row[idx] for idx in key_idx]): row for row in rows}.values())
+
+    def stored(self, region_codes: List[str], months: List[str]) -> Dict[Tuple[str, str], bytes]:
+        # Slices never synced before (e.g. loaded by a full crawl) are fingerprinted from the table itself.
+        placeholders = ', '.join(['%s'] * len(months))
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT region_code, deal_ym, fingerprint FROM {self.sync_tbl} WHERE deal_ym IN ({placeholders})", months)
+                fingerprints = {(str(region_code), deal_ym): bytes(fingerprint) for region_code, deal_ym, fingerprint in cursor.fetchall()}
+            finally:
+                cursor.close()
+
+        missing = {(region_code, deal_ym) for region_code in region_codes for deal_ym in months} - fingerprints.keys()
+        if missing:
+            fingerprints.update(self.table_fingerprints(sorted({region_code for region_code, _ in missing}), sorted({deal_ym for _, deal_ym in missing}), missing))
+        return fingerprints
+
+    def table_fingerprints(self, region_codes: List[str], months: List[str], wanted) -> Dict[Tuple[str, str], bytes]:
+        keys: Dict[Tuple[str, str], List] = {key: [] for key in wanted}
+        call_cols = list(dict.fromkeys(['region_code', self.date_col] + self.key_cols))
+        key_idx = [call_cols.index(col) for col in self.key_cols]
+        start_date, end_date = month_range(months[0])[0], month_range(months[-1])[1]
+        for chunk in self.dbm.iter_data(self.tbl_name, call_cols, start_date=start_date, end_date=end_date, region_codes=region_codes):
+            for row in chunk.itertuples(index=False, name=None):
+                key = (str(row[0]), pd.Timestamp(row[1]).strftime('%Y%m'))
+                if key in keys:
+                    keys[key].append([row[idx] for idx in key_idx])
+        return {key: self.fingerprint(key_rows) for key, key_rows in keys.items()}
+
+    def record_query(self, rewritten: bool = False) -> str:
+        generation = ", generation = generation + 1" if rewritten else ""
+        return (
+            f"INSERT INTO {self.sync_tbl} (region_code, deal_ym, fingerprint, row_cnt, generation, synced_at) VALUES (%s, %s, %s, %s, {int(rewritten)}, NOW()) "
+            f"ON DUPLICATE KEY UPDATE fingerprint = VALUES(fingerprint), row_cnt = VALUES(row_cnt), synced_at = VALUES(synced_at){generation}"
+        )
+
+    def replace(self, region_code: str, deal_ym: str, rows: List[List[Any]], fingerprint: bytes, key_cols: Optional[List[str]] = None) -> Tuple[int, int]:
+        start_date, end_date = month_range(deal_ym)
+        record = (self.record_query(rewritten=True), (region_code, deal_ym, fingerprint, len(rows)))
+        return self.dbm.replace_rows(
+            self.tbl_name, f"region_code = %s AND {self.date_col} >= %s AND {self.date_col} < %s", (region_code, start_date, end_date),
+            rows, key_cols=key_cols, statements=[record]
+        )
+
+    def record(self, entries: List[Tuple[str, str, bytes, int]]) -> None:
+        # Unchanged slices are recorded too, so the next sync compares against the sync table only.
+        if not entries:
+            return
+        with self.dbm.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(self.record_query(), entries)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
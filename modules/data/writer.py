@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import threading
+
+from typing import Any, Callable, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from modules.util.logger import Logger
+from modules.data.dbm import DBM
+
+class WriteBehindBuffer:
+    def __init__(self, dbm: DBM, tbl_name: str, flush_rows: int = 50000, flush_interval: float = 60.0,
+                 method: str = 'values', on_flush: Optional[Callable[[], None]] = None, key_cols: Optional[List[str]] = None):
+        self.dbm = dbm
+        self.tbl_name = tbl_name
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.method = method
+        self.on_flush = on_flush
+        self.key_cols = key_cols
+        self.rows = []
+        self.lock = threading.RLock()
+        self.last_flush = time.monotonic()
+        self.total_rows = 0
+        self.total_time = 0.0
+        self.logger = Logger().get_logger(module_name='modules.data.dbm')
+
+    def add(self, rows: List[List[Any]]) -> None:
+        with self.lock:
+            self.rows.extend(rows)
+            if len(self.rows) >= self.flush_rows or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self) -> None:
+        # on_flush (checkpointing) only runs after the buffered rows are committed; on failure the rows go back
+        # into the buffer so the next flush retries them and the checkpoint never runs ahead of the data.
+        with self.lock:
+            rows, self.rows = self.rows, []
+            if rows:
+                try:
+                    row_cnt, elapsed = self.dbm.bulk_insert(self.tbl_name, rows, method=self.method, key_cols=self.key_cols)
+                except Exception:
+                    self.rows = rows + self.rows
+                    raise
+                self.total_rows += row_cnt
+                self.total_time += elapsed
+
+            self.last_flush = time.monotonic()
+            if self.on_flush:
+                self.on_flush()
+
+    def rows_per_sec(self) -> float:
+        return self.total_rows / self.total_time if self.total_time else 0.0
+
+    def close(self) -> None:
+        self.flush()
+        self.logger.info(f"Write-behind buffer for {self.tbl_name} flushed {self.total_rows} rows ({self.rows_per_sec():.0f} rows/sec).")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
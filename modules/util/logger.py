@@ -1,85 +1,199 @@
 import json
+import time
+import queue
+import atexit
 import logging
 import os
+import threading
 
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
+
+from modules.util.utils import load_config
+
+class DroppingQueueHandler(QueueHandler):
+    # Never blocks the caller on a full queue: records below ERROR are dropped and counted, errors wait up to
+    # block_timeout. The drop count is reported with the next record that gets through.
+    def __init__(self, q: queue.Queue, block_timeout: float = 1.0):
+        super().__init__(q)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.drop_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            if record.levelno >= logging.ERROR:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self.drop_lock:
+                self.dropped += 1
+            return
+        self.report_dropped()
+
+    def report_dropped(self):
+        with self.drop_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            record = logging.LogRecord(self.name or 'logger', logging.WARNING, __file__, 0, f"Log queue full; dropped {dropped} records.", None, None)
+            try:
+                self.queue.put_nowait(self.prepare(record))
+            except queue.Full:
+                with self.drop_lock:
+                    self.dropped += dropped
 
 class Logger:
+    # One instance per config file per process: the JSON is read and the handlers are built once, and every
+    # Logger() afterwards returns the same object. Console and file I/O run on a QueueListener thread per module.
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, config='./config/log/logging_configs.json'):
+        with cls._instances_lock:
+            key = (os.getpid(), os.path.abspath(config))
+            if key not in cls._instances:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                cls._instances[key] = instance
+            return cls._instances[key]
+
     def __init__(self, config='./config/log/logging_configs.json'):
-        with open(config, 'r') as config_file:
-            self.config = json.load(config_file)
-            
+        if self._initialized:
+            return
+        self.config_path = config
+        self.config = load_config(config)
+
         self.loggers = {}
+        self.handlers = {}
+        self.listeners = {}
         self.setup_loggers()
-        
+        atexit.register(self.shutdown)
+        self._initialized = True
+
+    @staticmethod
+    def get_formatter():
+        return logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
     def setup_loggers(self):
         for module, settings in self.config.items():
             logger = logging.getLogger(module)
             logger.setLevel(self.get_log_level(settings['level']))
-            
-            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-            
             logger.handlers = []
-            
+
             console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
-            
+            console_handler.setFormatter(self.get_formatter())
+            self.handlers[module] = [console_handler]
+
             if 'file' in settings:
                 try:
-                    file_handler = TimedRotatingFileHandler(
-                        filename=settings['file'],
-                        when=settings.get('rotate_when', 'midnight'),
-                        interval=settings.get('rotate_interval', 1),
-                        backupCount=settings.get('backup_count', 7),
-                        encoding='utf-8'
-                    )
-                    file_handler.setFormatter(formatter)
-                    logger.addHandler(file_handler)
+                    self.handlers[module].append(self.create_file_handler(settings['file'], settings))
                 except PermissionError as e:
-                    logger.error(f"PermissionError: {e}")
-            
+                    console_handler.handle(logger.makeRecord(module, logging.ERROR, __file__, 0, f"PermissionError: {e}", None, None))
+
+            # queue_size bounds the memory held by a stalled disk; past it, DroppingQueueHandler sheds records.
+            log_queue = queue.Queue(maxsize=int(settings.get('queue_size', 10000)))
+            logger.addHandler(DroppingQueueHandler(log_queue))
+            self.listeners[module] = QueueListener(log_queue, *self.handlers[module], respect_handler_level=True)
+            self.listeners[module].start()
+
             self.loggers[module] = logger
-            
+
+    def create_file_handler(self, filename, settings):
+        file_handler = TimedRotatingFileHandler(
+            filename=filename,
+            when=settings.get('rotate_when', 'midnight'),
+            interval=settings.get('rotate_interval', 1),
+            backupCount=settings.get('backup_count', 7),
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(self.get_formatter())
+        return file_handler
+
     def get_logger(self, module_name):
         return self.loggers.get(module_name, logging.getLogger(module_name))
-    
+
     @staticmethod
     def get_log_level(level):
         return getattr(logging, level.upper(), logging.INFO)
-    
+
     def update_log_level(self, module_name, new_level):
         if module_name in self.loggers:
             self.loggers[module_name].setLevel(self.get_log_level(new_level))
             self.config[module_name]['level'] = new_level
             self.save_config()
-            
+
     def update_log_file(self, module_name, new_file):
+        # The listener thread owns the handlers, so it is stopped (draining the queue) while they are swapped.
         if module_name in self.loggers:
             logger = self.loggers[module_name]
-            for handler in logger.handlers:
-                if isinstance(handler, TimedRotatingFileHandler):
-                    logger.removeHandler(handler)
-                    handler.close()
-                    break
-                
             try:
-                new_handler = TimedRotatingFileHandler(
-                    filename=new_file,
-                    when=self.config[module_name].get('rotate_when', 'midnight'),
-                    interval=self.config[module_name].get('rotate_interval', 1),
-                    backupCount=self.config[module_name].get('backup_count', 7),
-                    encoding='utf-8'
-                )
-                formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-                new_handler.setFormatter(formatter)
-                logger.addHandler(new_handler)
-                
-                self.config[module_name]['file'] = new_file
-                self.save_config()
+                new_handler = self.create_file_handler(new_file, self.config[module_name])
             except PermissionError as e:
                 logger.error(f"PermissionError: {e}")
-            
+                return
+
+            listener = self.listeners[module_name]
+            listener.stop()
+            for handler in self.handlers[module_name]:
+                if isinstance(handler, TimedRotatingFileHandler):
+                    self.handlers[module_name].remove(handler)
+                    handler.close()
+                    break
+            self.handlers[module_name].append(new_handler)
+            self.listeners[module_name] = QueueListener(listener.queue, *self.handlers[module_name], respect_handler_level=True)
+            self.listeners[module_name].start()
+
+            self.config[module_name]['file'] = new_file
+            self.save_config()
+
+    def shutdown(self):
+        # Drains every queue before the process exits; registered with atexit.
+        for listener in self.listeners.values():
+            if listener._thread is not None:
+                listener.stop()
+        for handlers in self.handlers.values():
+            for handler in handlers:
+                handler.close()
+
     def save_config(self):
-        with open('./config/log/logging_configs.json', 'w') as config_file:
-            json.dump(self.config, config_file, indent=4)
\ No newline at end of file
+        with open(self.config_path, 'w') as config_file:
+            json.dump(self.config, config_file, indent=4)
+
+class RateLimitedLog:
+    # Aggregates repeated warnings by message: the first one is logged right away, later ones at most once per
+    # interval with the summed count, e.g. "Missing essential data: [412 Items in 37 batches over 60s]".
+    def __init__(self, logger, interval: float = 60.0):
+        self.logger = logger
+        self.interval = interval
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.last_emit = float('-inf')
+        self.window_start = time.monotonic()
+
+    def add(self, level: int, message: str, count: int) -> None:
+        with self.lock:
+            if not self.pending:
+                self.window_start = time.monotonic()
+            total, batches = self.pending.get((level, message), (0, 0))
+            self.pending[(level, message)] = (total + count, batches + 1)
+            if time.monotonic() - self.last_emit < self.interval:
+                return
+            pending = self.take()
+        self.emit(*pending)
+
+    def flush(self) -> None:
+        with self.lock:
+            pending = self.take()
+        self.emit(*pending)
+
+    def take(self):
+        pending, self.pending = self.pending, {}
+        self.last_emit = time.monotonic()
+        return pending, self.last_emit - self.window_start
+
+    def emit(self, pending, elapsed: float) -> None:
+        for (level, message), (total, batches) in pending.items():
+            if batches == 1:
+                self.logger.log(level, f"{message}: [{total} Items]")
+            else:
+                self.logger.log(level, f"{message}: [{total} Items in {batches} batches over {elapsed:.0f}s]")
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import bisect
+import threading
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+SIZE_BUCKETS = [1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216]
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        # Upper bound of the bucket holding the q-th observation, capped at the largest value seen.
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, cnt in zip(self.buckets, self.counts):
+            seen += cnt
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5), 'p99': self.quantile(0.99)
+        }
+
+class Metrics:
+    # Process-wide counters, gauges and histograms keyed by (name, sorted labels). Recording is a dict update under
+    # one lock, cheap enough for per-request calls; parse workers in other processes report through ParsedBatch.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.counters: Dict[Tuple, float] = {}
+        self.gauges: Dict[Tuple, float] = {}
+        self.histograms: Dict[Tuple, Histogram] = {}
+
+    @staticmethod
+    def key(name: str, labels: Optional[Dict[str, str]]) -> Tuple:
+        return (name, tuple(sorted((labels or {}).items())))
+
+    def inc(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None) -> None:
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self.lock:
+            self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None, buckets: List[float] = LATENCY_BUCKETS) -> None:
+        key = self.key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets)
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, labels: Optional[Dict[str, str]] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.start_time = time.time()
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    @staticmethod
+    def label_str(labels: Tuple) -> str:
+        return ','.join(f"{key}={value}" for key, value in labels)
+
+    def snapshot(self) -> dict:
+        # Counters also carry their average rate since start, e.g. rows/sec per table or calls/sec per service key.
+        with self.lock:
+            elapsed = max(time.time() - self.start_time, 1e-9)
+            report = {'started_at': self.start_time, 'elapsed': elapsed, 'counters': {}, 'gauges': {}, 'histograms': {}}
+            for (name, labels), value in self.counters.items():
+                report['counters'].setdefault(name, {})[self.label_str(labels)] = {'value': value, 'per_sec': value / elapsed}
+            for (name, labels), value in self.gauges.items():
+                report['gauges'].setdefault(name, {})[self.label_str(labels)] = value
+            for (name, labels), histogram in self.histograms.items():
+                report['histograms'].setdefault(name, {})[self.label_str(labels)] = histogram.snapshot()
+        return report
+
+    @staticmethod
+    def prom_labels(labels: Tuple, extra: Tuple = ()) -> str:
+        pairs = [(key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in labels + extra]
+        return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}' if pairs else ''
+
+    def to_prometheus(self, prefix: str = 'atam_') -> str:
+        lines = []
+        with self.lock:
+            for kind, series, suffix in (('counter', self.counters, '_total'), ('gauge', self.gauges, '')):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# TYPE {prefix}{name}{suffix} {kind}")
+                    for (series_name, labels), value in series.items():
+                        if series_name == name:
+                            lines.append(f"{prefix}{name}{suffix}{self.prom_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for (series_name, labels), histogram in self.histograms.items():
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, cnt in zip(histogram.buckets + ['+Inf'], histogram.counts):
+                        cumulative += cnt
+                        lines.append(f"{prefix}{name}_bucket{self.prom_labels(labels, (('le', bound),))} {cumulative}")
+                    lines.append(f"{prefix}{name}_sum{self.prom_labels(labels)} {histogram.sum}")
+                    lines.append(f"{prefix}{name}_count{self.prom_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path: str, fmt: str = 'json') -> None:
+        # Written to a temporary file and renamed, so node_exporter's textfile collector never reads a partial file.
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = self.to_prometheus() if fmt == 'prometheus' else json.dumps(self.snapshot(), indent=4)
+        with open(f"{path}.tmp", 'w') as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
+
+metrics = Metrics()
+
+class MetricsExporter:
+    def __init__(self, path: str, fmt: str = 'json', interval: float = 30.0, registry: Metrics = metrics, logger=None):
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self.registry = registry
+        self.logger = logger
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='metrics-exporter', daemon=True)
+
+    def start(self) -> 'MetricsExporter':
+        self.thread.start()
+        return self
+
+    def run(self) -> None:
+        while not self.done.wait(self.interval):
+            self.export()
+
+    def export(self) -> None:
+        try:
+            self.registry.export(self.path, self.fmt)
+        except OSError as e:
+            if self.logger is not None:
+                self.logger.error(f"Error exporting metrics to {self.path} : {str(e)}.")
+
+    def stop(self) -> None:
+        self.done.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.export()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -1,4 +1,10 @@
+import os
+import json
+import hashlib
 import datetime
+import threading
+
+from decimal import Decimal
 
 def date_generator(start_year, end_year):
     start_date = datetime.date(start_year, 1, 1)
@@ -12,4 +18,34 @@ def date_generator(start_year, end_year):
         current_date = current_date.replace(day=1) + datetime.timedelta(days=32)
         current_date = current_date.replace(day=1)
         
-    return date_list
\ No newline at end of file
+    return date_list
+
+def natural_key_hash(values):
+    # Numbers are normalised to two decimals so a key built from crawler output matches one built from DB rows.
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append('')
+        elif isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            parts.append(f"{float(value):.2f}")
+        elif isinstance(value, (datetime.date, datetime.datetime)):
+            parts.append(value.strftime('%Y-%m-%d'))
+        else:
+            parts.append(str(value).strip())
+    return hashlib.md5('\x1f'.join(parts).encode('utf-8')).digest()
+
+_config_cache = {}
+_config_lock = threading.Lock()
+
+def load_config(path, encoding='utf-8'):
+    # Parsed once per process and shared by every caller; a changed mtime (e.g. after Logger.save_config) reloads it.
+    # Callers that adjust entries (CompactTrade registering defaults) therefore do so process-wide.
+    key = os.path.abspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    with _config_lock:
+        cached = _config_cache.get(key)
+        if cached is None or cached[0] != mtime:
+            with open(key, 'r', encoding=encoding) as config_file:
+                cached = (mtime, json.load(config_file))
+            _config_cache[key] = cached
+        return cached[1]
@@ -0,0 +1,49 @@
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from modules.data.emptiness import EmptinessIndex
+
+def history(counts, start_year=2020):
+    return {f"{start_year + idx // 12}{idx % 12 + 1:02d}": cnt for idx, cnt in enumerate(counts)}
+
+def make_index(tmp_path, regions):
+    index = EmptinessIndex(str(tmp_path / 'emptiness_index.json'))
+    index.update({region_code: history(counts) for region_code, counts in regions.items()})
+    return index
+
+def test_classify_tiers(tmp_path):
+    index = make_index(tmp_path, {
+        'short': [0] * 12,
+        'busy': [5] * 36,
+        'empty': [0] * 36,
+        'sparse': [0] * 34 + [1, 2],
+        'uneven': [0] * 30 + [1] * 6
+    })
+    assert index.classify('short') == 'fetch'
+    assert index.classify('unknown') == 'fetch'
+    assert index.classify('busy') == 'fetch'
+    assert index.classify('empty') == 'skip'
+    assert index.classify('sparse') == 'defer'
+    assert index.classify('uneven') == 'fetch'
+    assert index.plan(['busy', 'empty', 'sparse']) == {'fetch': ['busy'], 'defer': ['sparse'], 'skip': ['empty']}
+
+def test_classify_uses_recent_window(tmp_path):
+    # Trades older than the window no longer count against deferring or skipping.
+    index = make_index(tmp_path, {'moved': [9] * 24 + [0] * 35 + [1], 'gone': [9] * 24 + [0] * 36})
+    assert index.classify('moved') == 'defer'
+    assert index.classify('gone') == 'skip'
+
+def test_defer_reachable_with_one_trade(tmp_path):
+    # The highest smoothed rate a region with a trade can reach is window / (window + 2); the default threshold is below it.
+    index = make_index(tmp_path, {'single': [0] * 35 + [1]})
+    assert index.p_empty('single') == 36 / 38
+    assert index.p_empty('single') >= index.defer_threshold
+    assert index.classify('single') == 'defer'
+
+def test_save_and_load(tmp_path):
+    index = make_index(tmp_path, {'sparse': [0] * 34 + [1, 2]})
+    index.save()
+    assert EmptinessIndex(index.path).classify('sparse') == 'defer'